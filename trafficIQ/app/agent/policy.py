@@ -1,9 +1,18 @@
 """Policy configuration for TrafficIQ agent."""
 
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 
+import numpy as np
 
-@dataclass
+from app.agent.policy_fast import classify_batch
+
+# Image conditions that degrade vehicle prediction quality
+_DEGRADED_RE = re.compile(r"night|blur|rain|low_res", re.IGNORECASE)
+
+
+@dataclass(frozen=True, slots=True)
 class PolicyConfig:
     """Configuration for decision policies."""
     
@@ -24,32 +33,18 @@ class PolicyConfig:
     BLUR_QUALITY_PENALTY: float = 0.20
     """Confidence reduction for blurry images"""
     
-    # Priority assignment
-    P0_THRESHOLDS: dict = None
-    """P0 (Critical): BOLO match + high confidence"""
+    RAIN_QUALITY_PENALTY: float = 0.10
+    """Confidence reduction for rainy images"""
     
-    P1_THRESHOLDS: dict = None
-    """P1 (Medium): BOLO match + lower confidence"""
+    LOW_RES_QUALITY_PENALTY: float = 0.15
+    """Confidence reduction for low-resolution images"""
     
-    P2_THRESHOLDS: dict = None
-    """P2 (Low): No BOLO match"""
+    # Priority assignment (BOLO match required for P0/P1; otherwise P2)
+    P0_MIN_CONFIDENCE: float = 0.70
+    """P0 (Critical): BOLO match + confidence at or above this"""
     
-    def __post_init__(self):
-        """Set default threshold dicts."""
-        if self.P0_THRESHOLDS is None:
-            self.P0_THRESHOLDS = {
-                "bolo_match": True,
-                "min_confidence": 0.70,
-            }
-        if self.P1_THRESHOLDS is None:
-            self.P1_THRESHOLDS = {
-                "bolo_match": True,
-                "min_confidence": 0.50,
-            }
-        if self.P2_THRESHOLDS is None:
-            self.P2_THRESHOLDS = {
-                "bolo_match": False,
-            }
+    P1_MIN_CONFIDENCE: float = 0.50
+    """P1 (Medium): BOLO match + confidence at or above this"""
 
     def should_use_ocr_fallback(
         self, 
@@ -59,18 +54,22 @@ class PolicyConfig:
         """
         Determine if OCR fallback should be used.
         
-        Returns True if:
-        - Vehicle confidence is below threshold OR
-        - Image quality is degraded (night, blur, etc.)
+        Vehicle confidence is reduced by the quality penalty of each degraded
+        condition present (night, blur, rain, low_res). Returns True if the
+        adjusted score is below MIN_VEHICLE_CONFIDENCE_FOR_SKIP_OCR.
         """
-        if vehicle_confidence < self.MIN_VEHICLE_CONFIDENCE_FOR_SKIP_OCR:
-            return True
-        
-        degraded_conditions = ["night", "blur", "rain", "low_res"]
-        if any(cond in image_condition.lower() for cond in degraded_conditions):
-            return True
+        if _DEGRADED_RE.search(image_condition) is None:
+            return vehicle_confidence < self.MIN_VEHICLE_CONFIDENCE_FOR_SKIP_OCR
         
-        return False
+        cond = image_condition.lower()
+        score = (
+            vehicle_confidence
+            - (self.NIGHT_QUALITY_PENALTY if "night" in cond else 0.0)
+            - (self.BLUR_QUALITY_PENALTY if "blur" in cond else 0.0)
+            - (self.RAIN_QUALITY_PENALTY if "rain" in cond else 0.0)
+            - (self.LOW_RES_QUALITY_PENALTY if "low_res" in cond else 0.0)
+        )
+        return score < self.MIN_VEHICLE_CONFIDENCE_FOR_SKIP_OCR
 
     def assign_priority(self, bolo_match: bool, confidence: float) -> str:
         """
@@ -79,16 +78,39 @@ class PolicyConfig:
         Returns "P0", "P1", or "P2"
         """
         if bolo_match:
-            if confidence >= self.P0_THRESHOLDS["min_confidence"]:
+            if confidence >= self.P0_MIN_CONFIDENCE:
                 return "P0"
-            elif confidence >= self.P1_THRESHOLDS["min_confidence"]:
+            elif confidence >= self.P1_MIN_CONFIDENCE:
                 return "P1"
             else:
                 return "P2"
         else:
             return "P2"
 
+    def assign_priority_batch(
+        self,
+        bolo_matches: np.ndarray,
+        confidences: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Assign priorities to many results at once, e.g. offline re-scoring.
+        
+        Args:
+            bolo_matches: Boolean BOLO match flags
+            confidences: Vehicle confidences, same length as bolo_matches
+            
+        Returns:
+            int8 array of priority codes (0=P0, 1=P1, 2=P2)
+        """
+        return classify_batch(
+            bolo_matches,
+            confidences,
+            self.P0_MIN_CONFIDENCE,
+            self.P1_MIN_CONFIDENCE,
+        )
+
     @staticmethod
+    @lru_cache(maxsize=1)
     def default() -> "PolicyConfig":
-        """Get default policy configuration."""
+        """Get the shared default policy configuration (frozen, so safe to share)."""
         return PolicyConfig()
@@ -0,0 +1,81 @@
+"""Vectorized priority classification for bulk re-scoring."""
+
+import numpy as np
+
+try:
+    import numba
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    _NUMBA_AVAILABLE = False
+
+# Priority labels indexed by the int8 codes returned from classify_batch
+PRIORITY_LABELS = ("P0", "P1", "P2")
+
+
+def _classify_batch_numpy(
+    bolo: np.ndarray,
+    conf: np.ndarray,
+    p0_min: float,
+    p1_min: float,
+) -> np.ndarray:
+    """Classify confidences with numpy masks."""
+    out = np.full(bolo.shape[0], 2, dtype=np.int8)
+    out[bolo & (conf >= p1_min)] = 1
+    out[bolo & (conf >= p0_min)] = 0
+    return out
+
+
+if _NUMBA_AVAILABLE:
+
+    @numba.njit(parallel=True, cache=True)
+    def _classify_batch_numba(bolo, conf, p0_min, p1_min):
+        """Classify confidences in a parallel compiled loop."""
+        n = bolo.shape[0]
+        out = np.empty(n, dtype=np.int8)
+        for i in numba.prange(n):
+            if bolo[i] and conf[i] >= p0_min:
+                out[i] = 0
+            elif bolo[i] and conf[i] >= p1_min:
+                out[i] = 1
+            else:
+                out[i] = 2
+        return out
+
+
+def classify_batch(
+    bolo_matches: np.ndarray,
+    confidences: np.ndarray,
+    p0_min_confidence: float = 0.70,
+    p1_min_confidence: float = 0.50,
+) -> np.ndarray:
+    """
+    Assign priorities to many (BOLO match, confidence) pairs at once.
+
+    Confidences are compared against the thresholds exactly as in
+    PolicyConfig.assign_priority, so batch and per-item results agree.
+    Uses a Numba kernel when Numba is installed, else numpy masks.
+
+    Args:
+        bolo_matches: Boolean BOLO match flags
+        confidences: Vehicle confidences, same length as bolo_matches
+        p0_min_confidence: Minimum confidence for P0 given a BOLO match
+        p1_min_confidence: Minimum confidence for P1 given a BOLO match
+
+    Returns:
+        int8 array of priority codes (0=P0, 1=P1, 2=P2), see PRIORITY_LABELS
+    """
+    bolo = np.asarray(bolo_matches, dtype=np.bool_)
+    conf = np.asarray(confidences, dtype=np.float64)
+    if bolo.shape != conf.shape:
+        raise ValueError(
+            f"Shape mismatch: bolo_matches {bolo.shape} vs confidences {conf.shape}"
+        )
+
+    p0_min = float(p0_min_confidence)
+    p1_min = float(p1_min_confidence)
+
+    if _NUMBA_AVAILABLE:
+        codes: np.ndarray = _classify_batch_numba(bolo, conf, p0_min, p1_min)
+        return codes
+    return _classify_batch_numpy(bolo, conf, p0_min, p1_min)
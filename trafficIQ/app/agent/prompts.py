@@ -1,5 +1,33 @@
 """Prompts and templates for TrafficIQ agent."""
 
+import string
+from typing import Dict, Optional, Tuple
+
+_Segments = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _compile(template: str) -> _Segments:
+    """
+    Pre-parse a format template into (literal, field_name) segments.
+    
+    Only plain ``{field}`` placeholders are supported; format specs and
+    conversions are ignored.
+    """
+    return tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+
+
+def _render(segments: _Segments, values: Dict[str, str]) -> str:
+    """Render pre-parsed segments; equivalent to ``template.format(**values)``."""
+    parts = []
+    for literal, field_name in segments:
+        parts.append(literal)
+        if field_name is not None:
+            parts.append(str(values[field_name]))
+    return "".join(parts)
+
 
 class Prompts:
     """Collection of prompts for the agent."""
@@ -82,6 +110,12 @@ Rules:
 Return JSON with field: priority
 """
 
+    # Pre-parsed instruction templates used by the getters below
+    _ANALYZE_SEGMENTS = _compile(ANALYZE_INSTRUCTION)
+    _OCR_SEGMENTS = _compile(OCR_INSTRUCTION)
+    _BOLO_SEGMENTS = _compile(BOLO_INSTRUCTION)
+    _PRIORITY_SEGMENTS = _compile(PRIORITY_INSTRUCTION)
+
     CASE_SUMMARY_TEMPLATE = """Case Summary: {case_id}
 ================
 
@@ -111,19 +145,19 @@ Notes: {notes}
     @staticmethod
     def get_analyze_prompt(image_uri: str, location: str = "", timestamp: str = "") -> str:
         """Get vehicle analysis prompt."""
-        return Prompts.ANALYZE_INSTRUCTION.format(
-            image_uri=image_uri,
-            location=location or "Unknown",
-            timestamp=timestamp or "Unknown",
-        )
+        return _render(Prompts._ANALYZE_SEGMENTS, {
+            "image_uri": image_uri,
+            "location": location or "Unknown",
+            "timestamp": timestamp or "Unknown",
+        })
 
     @staticmethod
     def get_ocr_prompt(image_uri: str, image_condition: str = "") -> str:
         """Get OCR extraction prompt."""
-        return Prompts.OCR_INSTRUCTION.format(
-            image_uri=image_uri,
-            image_condition=image_condition or "Unknown",
-        )
+        return _render(Prompts._OCR_SEGMENTS, {
+            "image_uri": image_uri,
+            "image_condition": image_condition or "Unknown",
+        })
 
     @staticmethod
     def get_bolo_prompt(
@@ -134,13 +168,13 @@ Notes: {notes}
         location: str = "",
     ) -> str:
         """Get BOLO lookup prompt."""
-        return Prompts.BOLO_INSTRUCTION.format(
-            make=make,
-            model=model,
-            year_range=year_range,
-            plate=plate or "Unknown",
-            location=location or "Unknown",
-        )
+        return _render(Prompts._BOLO_SEGMENTS, {
+            "make": make,
+            "model": model,
+            "year_range": year_range,
+            "plate": plate or "Unknown",
+            "location": location or "Unknown",
+        })
 
     @staticmethod
     def get_priority_prompt(
@@ -150,9 +184,9 @@ Notes: {notes}
         image_quality: str,
     ) -> str:
         """Get priority assignment prompt."""
-        return Prompts.PRIORITY_INSTRUCTION.format(
-            bolo_match="Yes" if bolo_match else "No",
-            pred_confidence=f"{pred_confidence:.2f}",
-            bolo_confidence=f"{bolo_confidence:.2f}",
-            image_quality=image_quality,
-        )
+        return _render(Prompts._PRIORITY_SEGMENTS, {
+            "bolo_match": "Yes" if bolo_match else "No",
+            "pred_confidence": f"{pred_confidence:.2f}",
+            "bolo_confidence": f"{bolo_confidence:.2f}",
+            "image_quality": image_quality,
+        })
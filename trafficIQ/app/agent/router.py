@@ -1,5 +1,6 @@
 """Agent router and orchestration logic."""
 
+import asyncio
 import logging
 import time
 from datetime import datetime
@@ -12,25 +13,83 @@ from app.common.schemas import (
     AgentResult,
     Priority,
 )
-from app.tools.vertex_client import VertexAIClient
+from app.tools.vertex_client import VertexAIClient, get_vertex_client
 from app.tools.ocr_client import OCRClient
 from app.tools.bolo_client import BOLOClient
 from app.tools.evidence import EvidencePacketBuilder
 from app.tools.case_client import CaseClient
 from app.agent.policy import PolicyConfig
 from app.agent.prompts import Prompts
-from app.common.config import get_config
+from app.common.batching import AsyncBatchQueue
+from app.common.config import Config, get_config
 
 logger = logging.getLogger(__name__)
 
+# Canonical processing step names, in pipeline order; bit i of a step mask
+# marks STEP_NAMES[i] as done
+STEP_NAMES = (
+    "vehicle_prediction_request",
+    "vehicle_prediction_received",
+    "ocr_fallback_triggered",
+    "ocr_plate_extracted",
+    "ocr_skipped",
+    "bolo_lookup_started",
+    "bolo_lookup_completed",
+    "priority_assignment",
+    "evidence_packet_building",
+    "evidence_packet_created",
+    "case_creation",
+    "case_created",
+)
+
+STEP_VP_REQ = 1 << 0
+STEP_VP_OK = 1 << 1
+STEP_OCR_TRIGGERED = 1 << 2
+STEP_OCR_OK = 1 << 3
+STEP_OCR_SKIPPED = 1 << 4
+STEP_BOLO_REQ = 1 << 5
+STEP_BOLO_OK = 1 << 6
+STEP_PRIORITY = 1 << 7
+STEP_EVIDENCE_REQ = 1 << 8
+STEP_EVIDENCE_OK = 1 << 9
+STEP_CASE_REQ = 1 << 10
+STEP_CASE_OK = 1 << 11
+
+# Case summary template; positional slots filled by _generate_case_summary
+_SUMMARY_FMT = (
+    "Vehicle ID: {} {} ({}) - {} {}. "
+    "Confidence: {:.1%}. "
+    "BOLO Match: {} ({}). "
+    "OCR used: {}. "
+    "Priority: {}."
+)
+
+
+def step_names(steps: int) -> list:
+    """
+    Expand a processing step mask into step names.
+    
+    Args:
+        steps: Bitwise-or of STEP_* flags
+        
+    Returns:
+        Names of the set steps, in pipeline order
+    """
+    return [name for i, name in enumerate(STEP_NAMES) if steps & (1 << i)]
+
 
 class TrafficIQAgent:
     """Main orchestration agent that routes vehicle identification pipeline."""
 
     def __init__(
         self,
-        config: Optional[object] = None,
+        config: Optional[Config] = None,
         policy: Optional[PolicyConfig] = None,
+        vertex_client: Optional[VertexAIClient] = None,
+        ocr_client: Optional[OCRClient] = None,
+        bolo_client: Optional[BOLOClient] = None,
+        evidence_builder: Optional[EvidencePacketBuilder] = None,
+        case_client: Optional[CaseClient] = None,
     ):
         """
         Initialize agent with tools and policy.
@@ -38,19 +97,52 @@ class TrafficIQAgent:
         Args:
             config: Application configuration
             policy: Policy configuration for decision-making
+            vertex_client: Pre-built Vertex AI client (default: shared client
+                when using the global config)
+            ocr_client: Pre-built OCR client
+            bolo_client: Pre-built BOLO client
+            evidence_builder: Pre-built evidence packet builder
+            case_client: Pre-built case client
         """
         self.config = config or get_config()
         self.policy = policy or PolicyConfig.default()
         
-        # Initialize tools
-        self.vertex_client = VertexAIClient(self.config)
-        self.ocr_client = OCRClient()
-        self.bolo_client = BOLOClient()
-        self.evidence_builder = EvidencePacketBuilder(self.config)
-        self.case_client = CaseClient(self.config)
+        # Initialize tools, reusing any already built by the caller
+        if vertex_client is None:
+            vertex_client = (
+                get_vertex_client() if config is None else VertexAIClient(self.config)
+            )
+        self.vertex_client = vertex_client
+        self.ocr_client = ocr_client or OCRClient(self.config)
+        self.bolo_client = bolo_client or BOLOClient(self.config)
+        self.evidence_builder = evidence_builder or EvidencePacketBuilder(self.config)
+        self.case_client = case_client or CaseClient(self.config)
+        
+        # Shared batch queues for upstream calls (see attach_queues)
+        self.vertex_queue: Optional[AsyncBatchQueue] = None
+        self.ocr_queue: Optional[AsyncBatchQueue] = None
+        self.bolo_queue: Optional[AsyncBatchQueue] = None
         
         logger.info("TrafficIQAgent initialized")
 
+    def attach_queues(
+        self,
+        vertex_queue: Optional[AsyncBatchQueue] = None,
+        ocr_queue: Optional[AsyncBatchQueue] = None,
+        bolo_queue: Optional[AsyncBatchQueue] = None,
+    ) -> None:
+        """
+        Route upstream calls in run_async through shared batch queues.
+        
+        Args:
+            vertex_queue: Queue batching vertex_client.predict_vehicle_batch
+            ocr_queue: Queue batching ocr_client.extract_plate_batch
+            bolo_queue: Queue batching bolo_client.lookup_batch
+        """
+        self.vertex_queue = vertex_queue
+        self.ocr_queue = ocr_queue
+        self.bolo_queue = bolo_queue
+
     def run(
         self,
         image_uri: str,
@@ -60,6 +152,9 @@ class TrafficIQAgent:
         """
         Run complete vehicle identification and case creation pipeline.
         
+        Blocking wrapper around run_async; must not be called from a running
+        event loop.
+        
         Args:
             image_uri: Image URI or path
             location: Optional location information
@@ -68,76 +163,103 @@ class TrafficIQAgent:
         Returns:
             AgentResult with all processing steps and outcomes
         """
-        start_time = time.time()
-        processing_steps = []
+        return asyncio.run(self.run_async(image_uri, location, timestamp))
+
+    async def run_async(
+        self,
+        image_uri: str,
+        location: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+    ) -> AgentResult:
+        """
+        Run complete vehicle identification and case creation pipeline.
+        
+        Vertex, OCR and BOLO calls go through the attached batch queues when
+        present, so concurrent runs share upstream requests.
+        
+        Args:
+            image_uri: Image URI or path
+            location: Optional location information
+            timestamp: Optional timestamp
+            
+        Returns:
+            AgentResult with all processing steps and outcomes
+        """
+        start_ns = time.perf_counter_ns()
+        steps = 0
         ocr_fallback_used = False
         plate_result = None
         bolo_match = None
         
         try:
-            logger.info(f"Starting agent run for {image_uri}")
+            logger.info("Starting agent run for %s", image_uri)
             
             # Step 1: Vehicle prediction
-            processing_steps.append("vehicle_prediction_request")
+            steps |= STEP_VP_REQ
             logger.debug("Step 1: Requesting vehicle prediction from Vertex AI")
             
-            vehicle_prediction = self.vertex_client.predict_vehicle(image_uri)
-            processing_steps.append("vehicle_prediction_received")
+            vehicle_prediction = await self.predict_vehicle(image_uri)
+            make = vehicle_prediction.make
+            model = vehicle_prediction.model
+            year = vehicle_prediction.year_range
+            conf = vehicle_prediction.confidence
+            condition = vehicle_prediction.image_condition
+            steps |= STEP_VP_OK
             
-            logger.info(
-                f"Vehicle prediction: {vehicle_prediction.make} {vehicle_prediction.model} "
-                f"(confidence: {vehicle_prediction.confidence:.2f})"
-            )
+            logger.info("Vehicle prediction: %s %s (confidence: %.2f)", make, model, conf)
             
             # Step 2: Conditional OCR fallback
-            should_ocr = self.policy.should_use_ocr_fallback(
-                vehicle_prediction.confidence,
-                vehicle_prediction.image_condition,
-            )
+            should_ocr = self.policy.should_use_ocr_fallback(conf, condition)
             
             if should_ocr:
-                processing_steps.append("ocr_fallback_triggered")
+                steps |= STEP_OCR_TRIGGERED
                 logger.debug(
-                    f"Step 2: OCR fallback triggered (confidence: {vehicle_prediction.confidence:.2f}, "
-                    f"condition: {vehicle_prediction.image_condition})"
+                    "Step 2: OCR fallback triggered (confidence: %.2f, condition: %s)",
+                    conf,
+                    condition,
                 )
                 
-                plate_result = self.ocr_client.extract_plate(image_uri)
+                plate_result = await self._extract_plate(image_uri)
                 ocr_fallback_used = True
-                processing_steps.append("ocr_plate_extracted")
+                steps |= STEP_OCR_OK
                 
-                logger.info(f"OCR plate extracted: {plate_result.plate_number} "
-                           f"(confidence: {plate_result.confidence:.2f})")
+                logger.info(
+                    "OCR plate extracted: %s (confidence: %.2f)",
+                    plate_result.plate_number,
+                    plate_result.confidence,
+                )
             else:
-                processing_steps.append("ocr_skipped")
+                steps |= STEP_OCR_SKIPPED
                 logger.debug("Step 2: OCR skipped (confidence sufficient)")
             
             # Step 3: BOLO database lookup
-            processing_steps.append("bolo_lookup_started")
+            steps |= STEP_BOLO_REQ
             logger.debug("Step 3: Checking BOLO database")
             
-            bolo_match = self.bolo_client.lookup(
-                make=vehicle_prediction.make,
-                model=vehicle_prediction.model,
-                year_range=vehicle_prediction.year_range,
-                plate=plate_result.plate_number if plate_result else None,
-                location=location,
-            )
-            processing_steps.append("bolo_lookup_completed")
+            bolo_match = await self._lookup_bolo({
+                "make": make,
+                "model": model,
+                "year_range": year,
+                "plate": plate_result.plate_number if plate_result else None,
+                "location": location,
+            })
+            steps |= STEP_BOLO_OK
             
-            logger.info(f"BOLO lookup: match={bolo_match.is_match}, reason={bolo_match.reason}")
+            logger.info("BOLO lookup: match=%s, reason=%s", bolo_match.is_match, bolo_match.reason)
             
             # Step 4: Priority assignment
-            processing_steps.append("priority_assignment")
+            steps |= STEP_PRIORITY
             priority = self._assign_priority(vehicle_prediction, bolo_match)
             
-            logger.info(f"Priority assigned: {priority}")
+            logger.info("Priority assigned: %s", priority)
             
             # Step 5: Evidence packet building
-            processing_steps.append("evidence_packet_building")
+            steps |= STEP_EVIDENCE_REQ
             logger.debug("Step 5: Building evidence packet")
             
-            evidence_packet = self.evidence_builder.build(
+            # File/GCS writes run off the event loop so concurrent runs proceed
+            evidence_packet = await asyncio.to_thread(
+                self.evidence_builder.build,
                 image_uri=image_uri,
                 vehicle_prediction=vehicle_prediction,
                 plate_result=plate_result,
@@ -145,10 +267,10 @@ class TrafficIQAgent:
                 location=location,
                 notes=f"OCR fallback used: {ocr_fallback_used}, BOLO match: {bolo_match.is_match}",
             )
-            processing_steps.append("evidence_packet_created")
+            steps |= STEP_EVIDENCE_OK
             
             # Step 6: Case creation
-            processing_steps.append("case_creation")
+            steps |= STEP_CASE_REQ
             logger.debug("Step 6: Creating case record")
             
             case_summary = self._generate_case_summary(
@@ -159,22 +281,24 @@ class TrafficIQAgent:
                 ocr_fallback_used,
             )
             
-            case_record = self.case_client.create_case(
+            case_record = await asyncio.to_thread(
+                self.case_client.create_case,
                 summary=case_summary,
                 priority=priority,
                 evidence_path=evidence_packet.evidence_path,
-                vehicle_make=vehicle_prediction.make,
-                vehicle_model=vehicle_prediction.model,
-                vehicle_year_range=vehicle_prediction.year_range,
+                vehicle_make=make,
+                vehicle_model=model,
+                vehicle_year_range=year,
                 plate_number=plate_result.plate_number if plate_result else None,
                 location=location,
             )
-            processing_steps.append("case_created")
+            steps |= STEP_CASE_OK
             
-            logger.info(f"Case created: {case_record.case_id}")
+            logger.info("Case created: %s", case_record.case_id)
             
             # Build result
-            elapsed_ms = (time.time() - start_time) * 1000
+            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            processing_steps = step_names(steps)
             
             result = AgentResult(
                 image_uri=image_uri,
@@ -193,13 +317,42 @@ class TrafficIQAgent:
                 },
             )
             
-            logger.info(f"Agent run completed in {elapsed_ms:.2f}ms")
+            logger.info("Agent run completed in %.2fms", elapsed_ms)
             return result
             
         except Exception as e:
-            logger.error(f"Agent run failed: {str(e)}", exc_info=True)
+            logger.error("Agent run failed: %s", e, exc_info=True)
             raise
 
+    async def predict_vehicle(self, image_uri: str) -> VehiclePrediction:
+        """
+        Get vehicle prediction, batched when a Vertex queue is attached.
+        
+        Args:
+            image_uri: Path or URL to image
+            
+        Returns:
+            VehiclePrediction, via the shared queue if any, else a direct call
+        """
+        if self.vertex_queue is not None:
+            prediction: VehiclePrediction = await self.vertex_queue.add_request(image_uri)
+            return prediction
+        return await asyncio.to_thread(self.vertex_client.predict_vehicle, image_uri)
+
+    async def _extract_plate(self, image_uri: str) -> PlateResult:
+        """Get OCR plate result, batched when an OCR queue is attached."""
+        if self.ocr_queue is not None:
+            plate: PlateResult = await self.ocr_queue.add_request(image_uri)
+            return plate
+        return await asyncio.to_thread(self.ocr_client.extract_plate, image_uri)
+
+    async def _lookup_bolo(self, query: dict) -> BOLOMatch:
+        """Get BOLO match, batched when a BOLO queue is attached."""
+        if self.bolo_queue is not None:
+            match: BOLOMatch = await self.bolo_queue.add_request(query)
+            return match
+        return await asyncio.to_thread(self.bolo_client.lookup, **query)
+
     def _assign_priority(
         self,
         vehicle_prediction: VehiclePrediction,
@@ -215,16 +368,9 @@ class TrafficIQAgent:
         Returns:
             Priority level (P0, P1, or P2)
         """
-        if bolo_match.is_match:
-            # Use prediction confidence as primary factor
-            if vehicle_prediction.confidence >= 0.70:
-                return Priority.P0
-            elif vehicle_prediction.confidence >= 0.50:
-                return Priority.P1
-            else:
-                return Priority.P2
-        else:
-            return Priority.P2
+        return Priority(
+            self.policy.assign_priority(bolo_match.is_match, vehicle_prediction.confidence)
+        )
 
     def _generate_case_summary(
         self,
@@ -235,11 +381,15 @@ class TrafficIQAgent:
         ocr_used: bool,
     ) -> str:
         """Generate case summary text."""
-        return (
-            f"Vehicle ID: {vehicle_prediction.make} {vehicle_prediction.model} "
-            f"({vehicle_prediction.year_range}) - {vehicle_prediction.color} {vehicle_prediction.body_type}. "
-            f"Confidence: {vehicle_prediction.confidence:.1%}. "
-            f"BOLO Match: {bolo_match.is_match} ({bolo_match.reason}). "
-            f"OCR used: {ocr_used}. "
-            f"Priority: {priority}."
+        return _SUMMARY_FMT.format(
+            vehicle_prediction.make,
+            vehicle_prediction.model,
+            vehicle_prediction.year_range,
+            vehicle_prediction.color,
+            vehicle_prediction.body_type,
+            vehicle_prediction.confidence,
+            bolo_match.is_match,
+            bolo_match.reason,
+            ocr_used,
+            priority,
         )
@@ -1,12 +1,18 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
+from typing import Tuple, Type
+import fastapi
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.common.config import get_config
 from app.common.logging import setup_logging
-from app.api.routes import router
+from app.common.writer import get_writer
+from app.api.routes import router, get_agent
 
 # Setup logging
 config = get_config()
@@ -14,6 +20,80 @@ setup_logging(log_level=config.log_level, json_logging=config.json_logging)
 
 logger = logging.getLogger(__name__)
 
+# Image used to exercise model clients before the first real request
+WARMUP_IMAGE_URI = "warmup/clear_vehicle.jpg"
+
+# Browser origins allowed to call the API in development
+DEV_CORS_ORIGINS = frozenset({"http://localhost:3000", "http://localhost:8080"})
+
+# First FastAPI release that serializes response models to JSON through Pydantic
+NATIVE_JSON_FASTAPI = (0, 130)
+
+
+def warmup_agent() -> None:
+    """Build the shared agent and run one prediction and OCR call."""
+    agent = get_agent()
+    try:
+        agent.vertex_client.predict_vehicle(WARMUP_IMAGE_URI)
+        agent.ocr_client.extract_plate(WARMUP_IMAGE_URI)
+        logger.info("Agent clients warmed up")
+    except Exception as e:
+        logger.warning("Agent warmup failed: %s", e)
+
+
+def fastapi_version() -> Tuple[int, ...]:
+    """Installed FastAPI (major, minor), or (0, 0) if it can't be parsed."""
+    version = getattr(fastapi, "__version__", "")
+    try:
+        return tuple(int(part) for part in version.split(".")[:2])
+    except ValueError:
+        return (0, 0)
+
+
+def default_response_class() -> Type[JSONResponse]:
+    """
+    Pick the fastest JSON response class available.
+    
+    From NATIVE_JSON_FASTAPI on, FastAPI serializes response models straight
+    to JSON bytes through Pydantic, but only for the default JSONResponse; on
+    older releases ORJSONResponse replaces the pure-Python encoder when orjson
+    is installed.
+    
+    Returns:
+        Response class to use as the application default
+    """
+    if fastapi_version() >= NATIVE_JSON_FASTAPI:
+        return JSONResponse
+    
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return JSONResponse
+    
+    from fastapi.responses import ORJSONResponse
+    return ORJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize application on startup and clean up on shutdown."""
+    logger.info("TrafficIQ API starting (Environment: %s)", config.environment)
+    config.setup_artifacts_dir()
+    logger.info("Artifacts directory ready")
+    warmup_agent()
+    
+    yield
+    
+    logger.info("TrafficIQ API shutting down")
+    agent = get_agent()
+    for queue in (agent.vertex_queue, agent.ocr_queue, agent.bolo_queue):
+        if queue is not None:
+            await queue.stop()
+    
+    # Drain any queued evidence/case writes
+    await asyncio.to_thread(get_writer().flush)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=config.api_title,
@@ -21,34 +101,24 @@ app = FastAPI(
     description="Multi-modal vehicle identification pipeline for traffic cameras",
     docs_url="/docs" if config.is_development else None,
     redoc_url="/redoc" if config.is_development else None,
+    lifespan=lifespan,
+    default_response_class=default_response_class(),
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"] if config.is_development else [],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add CORS middleware only when some origin may call the API
+cors_origins = DEV_CORS_ORIGINS if config.is_development else frozenset()
+if cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Include routes
 app.include_router(router, tags=["TrafficIQ"])
 
-# Startup/shutdown events
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup."""
-    logger.info(f"TrafficIQ API starting (Environment: {config.environment})")
-    config.setup_artifacts_dir()
-    logger.info("Artifacts directory ready")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown."""
-    logger.info("TrafficIQ API shutting down")
-
 
 if __name__ == "__main__":
     import uvicorn
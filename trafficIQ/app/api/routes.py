@@ -1,29 +1,57 @@
 """API routes for TrafficIQ."""
 
+import asyncio
 import logging
-from typing import Optional
-from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import TypeAdapter
 from app.common.schemas import (
     AnalyzeRequest,
     AgentRunRequest,
+    AgentRunBatchRequest,
     VehiclePrediction,
     AgentResult,
     HealthResponse,
 )
+from app.common.batching import AsyncBatchQueue
 from app.common.config import get_config
-from app.tools.vertex_client import VertexAIClient
+from app.common.utils import utc_now
+from app.tools.vertex_client import get_vertex_client
 from app.agent.router import TrafficIQAgent
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
 config = get_config()
-vertex_client = VertexAIClient(config)
-agent = TrafficIQAgent(config)
+
+# Response serializers built once at import; agent handlers return pre-encoded
+# JSON so FastAPI skips its own validate-and-encode pass on the way out
+_AGENT_RESULT_ADAPTER = TypeAdapter(AgentResult)
+_AGENT_RESULTS_ADAPTER = TypeAdapter(List[AgentResult])
+
+
+@lru_cache(maxsize=1)
+def get_agent() -> TrafficIQAgent:
+    """Get or create the shared agent, wired to per-stage batch queues."""
+    agent = TrafficIQAgent(config, vertex_client=get_vertex_client())
+    
+    # Shared per-stage queues so concurrent requests coalesce upstream calls
+    batch_wait_s = config.batch_max_wait_ms / 1000
+    agent.attach_queues(
+        vertex_queue=AsyncBatchQueue(
+            agent.vertex_client.predict_vehicle_batch, config.batch_max_size, batch_wait_s
+        ),
+        ocr_queue=AsyncBatchQueue(
+            agent.ocr_client.extract_plate_batch, config.batch_max_size, batch_wait_s
+        ),
+        bolo_queue=AsyncBatchQueue(
+            agent.bolo_client.lookup_batch, config.batch_max_size, batch_wait_s
+        ),
+    )
+    return agent
 
 
 @router.get("/health", response_model=HealthResponse)
@@ -41,6 +69,9 @@ async def analyze_vehicle(request: AnalyzeRequest) -> VehiclePrediction:
     """
     Analyze a vehicle image and return predictions.
     
+    Shares the agent's Vertex batch queue when attached, so concurrent
+    /analyze and /agent/run calls coalesce into multi-instance predictions.
+    
     Args:
         request: AnalyzeRequest containing image_uri
         
@@ -51,16 +82,15 @@ async def analyze_vehicle(request: AnalyzeRequest) -> VehiclePrediction:
         HTTPException: If analysis fails
     """
     try:
-        logger.info(f"Analyzing vehicle from {request.image_uri}")
-        prediction = vertex_client.predict_vehicle(request.image_uri)
-        return prediction
+        logger.info("Analyzing vehicle from %s", request.image_uri)
+        return await get_agent().predict_vehicle(request.image_uri)
     except Exception as e:
-        logger.error(f"Analysis failed: {str(e)}")
+        logger.error("Analysis failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
 @router.post("/agent/run", response_model=AgentResult)
-async def run_agent(request: AgentRunRequest) -> AgentResult:
+async def run_agent(request: AgentRunRequest) -> Response:
     """
     Run complete agent orchestration pipeline.
     
@@ -68,23 +98,66 @@ async def run_agent(request: AgentRunRequest) -> AgentResult:
         request: AgentRunRequest containing image_uri and optional location/timestamp
         
     Returns:
-        AgentResult with all processing steps and outcomes
+        JSON-encoded AgentResult with all processing steps and outcomes
         
     Raises:
         HTTPException: If agent execution fails
     """
     try:
-        logger.info(f"Running agent for {request.image_uri}")
+        logger.info("Running agent for %s", request.image_uri)
         
-        timestamp = request.timestamp or datetime.utcnow()
+        timestamp = request.timestamp or utc_now()
         
-        result = agent.run(
+        result = await get_agent().run_async(
             image_uri=request.image_uri,
             location=request.location,
             timestamp=timestamp,
         )
         
-        return result
+        return Response(
+            content=_AGENT_RESULT_ADAPTER.dump_json(result),
+            media_type="application/json",
+        )
     except Exception as e:
-        logger.error(f"Agent run failed: {str(e)}")
+        logger.error("Agent run failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Agent run failed: {str(e)}")
+
+
+@router.post("/agent/run_batch", response_model=List[AgentResult])
+async def run_agent_batch(request: AgentRunBatchRequest) -> Response:
+    """
+    Run the agent pipeline for several images concurrently.
+    
+    Runs share the per-stage batch queues, so N images become roughly
+    N / batch_max_size upstream calls per stage.
+    
+    Args:
+        request: AgentRunBatchRequest containing the individual run requests
+        
+    Returns:
+        JSON-encoded AgentResult for each item, in request order
+        
+    Raises:
+        HTTPException: If any agent run fails
+    """
+    try:
+        logger.info("Running agent batch of %d images", len(request.items))
+        
+        agent = get_agent()
+        now = utc_now()
+        results = await asyncio.gather(*(
+            agent.run_async(
+                image_uri=item.image_uri,
+                location=item.location,
+                timestamp=item.timestamp or now,
+            )
+            for item in request.items
+        ))
+        
+        return Response(
+            content=_AGENT_RESULTS_ADAPTER.dump_json(results),
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.error("Agent batch run failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Agent batch run failed: {str(e)}")
@@ -1,6 +1,8 @@
 """Common utilities for TrafficIQ."""
 
 from app.common.config import Config
+from app.common.batching import AsyncBatchQueue
+from app.common.writer import BackgroundWriter
 from app.common.logging import setup_logging, get_logger
 from app.common.schemas import (
     VehiclePrediction,
@@ -13,6 +15,8 @@ from app.common.schemas import (
 
 __all__ = [
     "Config",
+    "AsyncBatchQueue",
+    "BackgroundWriter",
     "setup_logging",
     "get_logger",
     "VehiclePrediction",
@@ -0,0 +1,186 @@
+"""Async request batching for upstream tool calls."""
+
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatchQueue:
+    """
+    Collates concurrent requests into batched calls to a processing function.
+
+    The batch window adapts to load: with nothing in flight upstream a batch
+    is flushed as soon as it is collected, and as in-flight calls pile up
+    relative to waiting requests the window stretches to coalesce more.
+    """
+
+    def __init__(
+        self,
+        process_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_time: float = 0.05,
+        max_wait_cap: float = 0.2,
+        flush_ratio: float = 0.25,
+    ):
+        """
+        Initialize batch queue.
+
+        Args:
+            process_fn: Blocking callable taking a list of items and returning
+                one result per item, in order
+            max_batch_size: Maximum number of items per upstream call
+            max_wait_time: Base seconds to wait for a batch to fill
+            max_wait_cap: Upper bound in seconds on the adaptive wait window
+            flush_ratio: In-flight/waiting ratio below which batches flush
+                immediately
+        """
+        self.process_fn = process_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self.max_wait_cap = max_wait_cap
+        self.flush_ratio = flush_ratio
+
+        # Load counters driving the adaptive window
+        self.inflight = 0
+        """Batches currently being processed upstream"""
+        self.waiting = 0
+        """Requests enqueued but not yet dispatched"""
+
+        # Replaced whenever the queue is first used on a new event loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    def add_request(self, item: Any) -> asyncio.Future:
+        """
+        Enqueue an item for the next batch.
+
+        Args:
+            item: Single input for process_fn
+
+        Returns:
+            Future resolved with the result for this item
+        """
+        loop = asyncio.get_running_loop()
+        self._ensure_running(loop)
+
+        future = loop.create_future()
+        self._queue.put_nowait((item, future))
+        self.waiting += 1
+        return future
+
+    def _ensure_running(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start the process loop on the current event loop if needed."""
+        if self._loop is not loop:
+            # Queues and tasks are bound to the loop that created them
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._task = None
+            self._batch_tasks = set()
+            self.inflight = 0
+            self.waiting = 0
+
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self.process_loop())
+
+    async def process_loop(self) -> None:
+        """Drain the queue into batches and dispatch them upstream."""
+        while True:
+            batch = await self._collect_batch()
+            self.waiting -= len(batch)
+            self.inflight += 1
+            task = asyncio.create_task(self._process_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Wait for up to max_batch_size items or until the wait window elapses."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        ratio = self.inflight / max(1, self.waiting)
+        if ratio < self.flush_ratio:
+            # Upstream is idle relative to demand; don't hold requests back
+            return batch
+
+        wait = min(self.max_wait_time * (1 + ratio), self.max_wait_cap)
+        deadline = loop.time() + wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _process_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Run process_fn on a batch and distribute results to each future."""
+        items = [item for item, _ in batch]
+
+        try:
+            results = await self._call(items)
+        except Exception as e:
+            if len(batch) == 1:
+                self._settle(batch[0][1], error=e)
+                return
+            # Retry each item alone so one bad input only fails its own caller
+            logger.warning("Batch of %d failed, retrying per item: %s", len(items), e)
+            await asyncio.gather(*(self._process_single(item, future) for item, future in batch))
+            return
+        finally:
+            self.inflight -= 1
+
+        for (_, future), result in zip(batch, results):
+            self._settle(future, result)
+
+        logger.debug("Processed batch of %d items", len(items))
+
+    async def _call(self, items: List[Any]) -> Sequence[Any]:
+        """Run process_fn in a worker thread and check it returned one result per item."""
+        results = await asyncio.to_thread(self.process_fn, items)
+        if len(results) != len(items):
+            raise ValueError(
+                f"Batch returned {len(results)} results for {len(items)} items"
+            )
+        return results
+
+    async def _process_single(self, item: Any, future: asyncio.Future) -> None:
+        """Run process_fn on one item, resolving or failing only its future."""
+        try:
+            results = await self._call([item])
+        except Exception as e:
+            logger.error("Batch item failed: %s", e)
+            self._settle(future, error=e)
+            return
+        self._settle(future, results[0])
+
+    @staticmethod
+    def _settle(
+        future: asyncio.Future, result: Any = None, error: Optional[Exception] = None
+    ) -> None:
+        """Resolve a future unless its caller has already given up on it."""
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def stop(self) -> None:
+        """Cancel the process loop and any in-flight batches."""
+        tasks = [t for t in [self._task, *self._batch_tasks] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._batch_tasks = set()
+        self.inflight = 0
@@ -1,5 +1,6 @@
 """Configuration management for TrafficIQ."""
 
+from functools import lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from typing import Optional
@@ -27,6 +28,8 @@ class Config(BaseSettings):
     artifacts_path: str = "./artifacts"
     use_gcs: bool = False
     gcs_bucket: Optional[str] = None
+    # Write local evidence and case files from a background thread
+    async_writes: bool = False
 
     # External Services
     bolo_service_url: str = "http://localhost:8001"
@@ -34,6 +37,20 @@ class Config(BaseSettings):
     case_service_url: str = "http://localhost:8002"
     case_api_key: str = "demo-key"
 
+    # Request batching
+    batch_max_size: int = 8
+    batch_max_wait_ms: float = 50.0
+
+    # Evaluation
+    eval_parallelism: int = 16
+    eval_batch_size: int = 32
+    # Per-batch prediction budget; slower batches are reported as stragglers (0 = no limit)
+    eval_sla_ms: float = 30000.0
+
+    # Testing
+    # Return fixed OCR and BOLO results instead of running the mock logic
+    fast_test_mode: bool = False
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -55,13 +72,7 @@ class Config(BaseSettings):
         return self.environment.lower() == "development"
 
 
-# Global config instance
-_config: Optional[Config] = None
-
-
+@lru_cache(maxsize=1)
 def get_config() -> Config:
     """Get or create global config instance."""
-    global _config
-    if _config is None:
-        _config = Config()
-    return _config
+    return Config()
@@ -5,6 +5,8 @@ from typing import Optional, List, Dict, Any
 from enum import Enum
 from pydantic import BaseModel, Field
 
+from app.common.utils import utc_now
+
 
 class VehicleConfidence(str, Enum):
     """Confidence levels for vehicle predictions."""
@@ -31,7 +33,7 @@ class VehiclePrediction(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0, description="Prediction confidence")
     image_condition: str = Field(default="clear", description="Image quality (clear, night, blur, etc.)")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class PlateResult(BaseModel):
@@ -39,7 +41,7 @@ class PlateResult(BaseModel):
     plate_number: str
     confidence: float = Field(..., ge=0.0, le=1.0)
     image_uri: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class BOLOMatch(BaseModel):
@@ -52,7 +54,7 @@ class BOLOMatch(BaseModel):
     reason: str = Field(default="", description="Reason for match or no-match")
     match_confidence: float = Field(default=0.0, ge=0.0, le=1.0)
     bolo_record_id: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class EvidencePacket(BaseModel):
@@ -63,7 +65,7 @@ class EvidencePacket(BaseModel):
     plate_result: Optional[PlateResult] = None
     bolo_match: Optional[BOLOMatch] = None
     location: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     notes: str = ""
     evidence_path: str = Field(..., description="Local or GCS path to saved evidence")
     metadata: Dict[str, Any] = Field(default_factory=dict)
@@ -80,7 +82,7 @@ class CaseRecord(BaseModel):
     vehicle_year_range: str
     plate_number: Optional[str] = None
     location: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     status: str = Field(default="open")
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
@@ -97,6 +99,11 @@ class AgentRunRequest(BaseModel):
     timestamp: Optional[datetime] = None
 
 
+class AgentRunBatchRequest(BaseModel):
+    """Request for /agent/run_batch endpoint."""
+    items: List[AgentRunRequest] = Field(..., min_length=1)
+
+
 class AgentResult(BaseModel):
     """Complete result from agent orchestration."""
     image_uri: str
@@ -109,7 +116,7 @@ class AgentResult(BaseModel):
     processing_steps: List[str] = Field(default_factory=list, description="Steps taken")
     total_processing_time_ms: float = Field(...)
     location: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
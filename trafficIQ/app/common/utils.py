@@ -1,51 +1,112 @@
 """Utility functions for TrafficIQ."""
 
-import hashlib
-import uuid
+import json
+import re
+import secrets
 import time
-from typing import Dict, Any
-from functools import wraps
+import zlib
+from datetime import datetime, timezone
+from types import MappingProxyType, ModuleType
+from operator import methodcaller
+from typing import Any, Callable, Mapping, Optional, Union
+from functools import lru_cache, wraps
+from weakref import WeakKeyDictionary
 import logging
 
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Image conditions encoded in mock image URIs
+_CONDITION_RE = re.compile(r"night|blur|low_res|rain")
+
 
 def generate_id(prefix: str = "") -> str:
-    """Generate a unique ID."""
-    uid = str(uuid.uuid4())[:8]
+    """Generate a unique ID with 8 random hex characters."""
+    uid = secrets.token_hex(4)
     return f"{prefix}-{uid}" if prefix else uid
 
 
+def utc_now() -> datetime:
+    """Get the current time as a timezone-aware UTC datetime."""
+    return datetime.now(timezone.utc)
+
+
+@lru_cache(maxsize=4096)
+def deterministic_bits(value: str) -> int:
+    """Generate a deterministic 32-bit unsigned integer from a string."""
+    return zlib.crc32(value.encode())
+
+
+@lru_cache(maxsize=4096)
 def deterministic_hash(value: str) -> float:
     """Generate a deterministic float between 0 and 1 from a string."""
-    hash_obj = hashlib.md5(value.encode())
-    hash_int = int(hash_obj.hexdigest(), 16)
-    return (hash_int % 100) / 100.0
+    return (deterministic_bits(value) % 100) / 100.0
 
 
-def extract_image_uri_features(image_uri: str) -> Dict[str, Any]:
-    """Extract features from image URI for mock predictions."""
-    uri_lower = image_uri.lower()
+@lru_cache(maxsize=4096)
+def extract_image_uri_features(image_uri: str) -> Mapping[str, Any]:
+    """
+    Extract features from image URI for mock predictions.
+    
+    Results are cached per URI and returned as a read-only mapping.
+    """
+    conditions = set(_CONDITION_RE.findall(image_uri.lower()))
     
     features = {
-        "is_night": "night" in uri_lower,
-        "is_blur": "blur" in uri_lower,
-        "is_low_res": "low_res" in uri_lower,
-        "is_rain": "rain" in uri_lower,
+        "is_night": "night" in conditions,
+        "is_blur": "blur" in conditions,
+        "is_low_res": "low_res" in conditions,
+        "is_rain": "rain" in conditions,
         "hash_value": deterministic_hash(image_uri),
     }
     
-    return features
+    return MappingProxyType(features)
+
+
+def dumps_json(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to JSON bytes, using orjson when installed.
+    
+    Args:
+        obj: Object to serialize; other types go through safe_json_serializable
+        indent: Pretty-print with two-space indentation
+        
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        encoded: bytes = orjson.dumps(
+            obj,
+            default=safe_json_serializable,
+            option=orjson.OPT_INDENT_2 if indent else 0,
+        )
+        return encoded
+    return json.dumps(obj, default=safe_json_serializable, indent=2 if indent else None).encode()
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def measure_time(func):
-    """Decorator to measure function execution time."""
+    """Decorator to log function execution time; no-op unless INFO is enabled."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.time()
+        if not logger.isEnabledFor(logging.INFO):
+            return func(*args, **kwargs)
+        
+        start = time.perf_counter()
         result = func(*args, **kwargs)
-        elapsed_ms = (time.time() - start) * 1000
-        logger.info(f"Function {func.__name__} took {elapsed_ms:.2f}ms")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info("Function %s took %.2fms", func.__name__, elapsed_ms)
         return result
     
     return wrapper
@@ -56,24 +117,47 @@ def log_operation(operation_name: str):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            logger.info(f"Starting operation: {operation_name}")
+            logger.info("Starting operation: %s", operation_name)
             try:
                 result = func(*args, **kwargs)
-                logger.info(f"Completed operation: {operation_name}")
+                logger.info("Completed operation: %s", operation_name)
                 return result
             except Exception as e:
-                logger.error(f"Failed operation: {operation_name}, error: {str(e)}")
+                logger.error("Failed operation: %s, error: %s", operation_name, e)
                 raise
         return wrapper
     return decorator
 
 
-def safe_json_serializable(obj: Any) -> Any:
-    """Convert object to JSON-serializable format."""
+# Converter chosen by safe_json_serializable, cached per type
+_SERIALIZERS: "WeakKeyDictionary[type, Callable[[Any], Any]]" = WeakKeyDictionary()
+
+
+def _resolve_serializer(obj: Any) -> Callable[[Any], Any]:
+    """Pick the JSON converter for obj's type."""
     if hasattr(obj, "model_dump"):
-        return obj.model_dump()
+        return methodcaller("model_dump")
     elif hasattr(obj, "dict"):
-        return obj.dict()
+        return methodcaller("dict")
     elif hasattr(obj, "__dict__"):
-        return obj.__dict__
-    return str(obj)
+        return vars
+    return str
+
+
+def safe_json_serializable(obj: Any) -> Any:
+    """
+    Convert object to JSON-serializable format.
+    
+    Usable as a json/orjson ``default`` hook. The attribute probing runs
+    once per type; later objects of that type reuse the chosen converter.
+    """
+    cls = type(obj)
+    serializer = _SERIALIZERS.get(cls)
+    if serializer is None:
+        serializer = _resolve_serializer(obj)
+        try:
+            _SERIALIZERS[cls] = serializer
+        except TypeError:
+            # Type doesn't support weak references; just don't cache it
+            pass
+    return serializer(obj)
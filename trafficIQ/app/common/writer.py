@@ -0,0 +1,106 @@
+"""Background file writer for evidence and case records."""
+
+import atexit
+import logging
+import queue
+import threading
+from functools import lru_cache
+from itertools import groupby
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWriter:
+    """
+    Writes files from a daemon thread so callers don't block on disk I/O.
+
+    Writes queued while the thread is busy are drained together, and
+    consecutive appends to the same file share a single open and write.
+    """
+
+    def __init__(self, max_batch: int = 256, buffer_size: int = 1 << 20):
+        """
+        Initialize writer.
+
+        Args:
+            max_batch: Maximum queued writes drained per pass
+            buffer_size: File buffer size in bytes for batched appends
+        """
+        self.max_batch = max_batch
+        self.buffer_size = buffer_size
+
+        self._queue: "queue.Queue[Tuple[Path, bytes, bool]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, path: Path, data: bytes, append: bool = True) -> None:
+        """
+        Queue bytes to be written to a file.
+
+        Args:
+            path: Destination file
+            data: Bytes to write
+            append: Append to the file if True, else replace its contents
+        """
+        self._ensure_running()
+        self._queue.put((Path(path), data, append))
+
+    def flush(self) -> None:
+        """Block until every write submitted so far has reached the file."""
+        if self._thread is not None:
+            # Restart a dead writer so queued writes drain instead of hanging
+            self._ensure_running()
+            self._queue.join()
+
+    def _ensure_running(self) -> None:
+        """Start the writer thread on first use, or again if it has died."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="trafficiq-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Drain the queue in batches until the process exits."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[Path, bytes, bool]]) -> None:
+        """Write a drained batch, grouping consecutive writes per file."""
+        for (path, append), group in groupby(batch, key=lambda w: (w[0], w[2])):
+            chunks = [data for _, data, _ in group]
+            try:
+                if append:
+                    with open(path, "ab", buffering=self.buffer_size) as f:
+                        f.write(b"".join(chunks))
+                else:
+                    # Only the last replacement of a file matters
+                    with open(path, "wb") as f:
+                        f.write(chunks[-1])
+            except Exception as e:
+                # Never let one bad write kill the thread and stall flush()
+                logger.error("Background write to %s failed: %s", path, e)
+
+
+@lru_cache(maxsize=1)
+def get_writer() -> BackgroundWriter:
+    """Get or create the shared background writer, drained at exit."""
+    writer = BackgroundWriter()
+    atexit.register(writer.flush)
+    return writer
@@ -1,6 +1,6 @@
 """Tools layer for TrafficIQ integrations."""
 
-from app.tools.vertex_client import VertexAIClient
+from app.tools.vertex_client import VertexAIClient, get_vertex_client
 from app.tools.ocr_client import OCRClient
 from app.tools.bolo_client import BOLOClient
 from app.tools.evidence import EvidencePacketBuilder
@@ -8,6 +8,7 @@ from app.tools.case_client import CaseClient
 
 __all__ = [
     "VertexAIClient",
+    "get_vertex_client",
     "OCRClient",
     "BOLOClient",
     "EvidencePacketBuilder",
@@ -1,23 +1,68 @@
 """BOLO (Be On Lookout) database client."""
 
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from app.common.schemas import BOLOMatch
 from app.common.utils import generate_id
+from app.common.config import Config, get_config
 
 logger = logging.getLogger(__name__)
 
 # Mock BOLO watchlist
-BOLO_WATCH_MAKES = ["Honda", "Toyota"]
-BOLO_WATCH_PLATES_ENDING = ["7", "99"]
-BOLO_WATCH_PLATE_PREFIX = ["ABC", "XYZ"]
+BOLO_WATCH_MAKES = frozenset({"Honda", "Toyota"})
+BOLO_WATCH_PLATES_ENDING = ("7", "99")
+BOLO_WATCH_PLATE_PREFIX = ("ABC", "XYZ")
+
+
+def _compile_plate_matcher(name: str, patterns: tuple, suffix: bool):
+    """
+    Generate a matcher with the watch patterns unrolled into per-character
+    comparisons.
+    
+    Args:
+        name: Name of the generated function
+        patterns: Fixed strings to test, in priority order
+        suffix: Match plate endings if True, else prefixes
+        
+    Returns:
+        Function mapping a plate to the first matching pattern, or None
+    """
+    lines = [f"def {name}(plate):", "    n = len(plate)"]
+    for pattern in patterns:
+        offsets = range(-len(pattern), 0) if suffix else range(len(pattern))
+        checks = " and ".join(
+            f"plate[{i}] == {ch!r}" for i, ch in zip(offsets, pattern)
+        )
+        lines.append(f"    if n >= {len(pattern)} and {checks or 'True'}:")
+        lines.append(f"        return {pattern!r}")
+    lines.append("    return None")
+    
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace[name]
+
+
+# Built once at import from the fixed watchlists
+_match_plate_ending = _compile_plate_matcher(
+    "_match_plate_ending", BOLO_WATCH_PLATES_ENDING, suffix=True
+)
+_match_plate_prefix = _compile_plate_matcher(
+    "_match_plate_prefix", BOLO_WATCH_PLATE_PREFIX, suffix=False
+)
 
 
 class BOLOClient:
     """Client for BOLO database lookups."""
 
-    def __init__(self):
-        """Initialize BOLO client."""
+    def __init__(self, config: Optional[Config] = None):
+        """
+        Initialize BOLO client.
+        
+        Args:
+            config: Application configuration
+        """
+        self.config = config or get_config()
+        self._fast = self.config.fast_test_mode
         logger.info("BOLO client initialized in MOCK mode")
 
     def lookup(
@@ -43,6 +88,18 @@ class BOLOClient:
         """
         return self._lookup_mock(make, model, year_range, plate, location)
 
+    def lookup_batch(self, queries: List[Dict[str, Any]]) -> List[BOLOMatch]:
+        """
+        Lookup several vehicles in a single request.
+        
+        Args:
+            queries: Keyword arguments for lookup(), one dict per vehicle
+            
+        Returns:
+            BOLOMatch for each query, in input order
+        """
+        return [self._lookup_mock(**query) for query in queries]
+
     def _lookup_mock(
         self,
         make: str,
@@ -52,6 +109,8 @@ class BOLOClient:
         location: Optional[str] = None,
     ) -> BOLOMatch:
         """Mock BOLO lookup with deterministic matches."""
+        if self._fast:
+            return BOLOMatch(is_match=False, reason="No match found")
         
         is_match = False
         reason = ""
@@ -65,25 +124,21 @@ class BOLOClient:
             match_confidence = 0.85
             bolo_id = generate_id("BOLO-MAKE")
         
-        # Check plate pattern
-        if plate and not is_match:
-            for ending in BOLO_WATCH_PLATES_ENDING:
-                if plate.endswith(ending):
-                    is_match = True
-                    reason = f"Plate pattern match ({ending})"
-                    match_confidence = 0.75
-                    bolo_id = generate_id("BOLO-PLATE")
-                    break
+        # Check plate pattern; matchers return the pattern that matched
+        ending = _match_plate_ending(plate) if plate and not is_match else None
+        if ending is not None:
+            is_match = True
+            reason = f"Plate pattern match ({ending})"
+            match_confidence = 0.75
+            bolo_id = generate_id("BOLO-PLATE")
         
         # Check plate prefix (secondary check)
-        if plate and not is_match:
-            for prefix in BOLO_WATCH_PLATE_PREFIX:
-                if plate.startswith(prefix):
-                    is_match = True
-                    reason = f"Plate prefix match ({prefix})"
-                    match_confidence = 0.70
-                    bolo_id = generate_id("BOLO-PREFIX")
-                    break
+        prefix = _match_plate_prefix(plate) if plate and not is_match else None
+        if prefix is not None:
+            is_match = True
+            reason = f"Plate prefix match ({prefix})"
+            match_confidence = 0.70
+            bolo_id = generate_id("BOLO-PREFIX")
         
         if not is_match:
             reason = "No match found"
@@ -100,7 +155,10 @@ class BOLOClient:
         )
         
         logger.debug(
-            f"BOLO lookup - Make: {make}, Plate: {plate}, Match: {is_match}, "
-            f"Reason: {reason}"
+            "BOLO lookup - Make: %s, Plate: %s, Match: %s, Reason: %s",
+            make,
+            plate,
+            is_match,
+            reason,
         )
         return match
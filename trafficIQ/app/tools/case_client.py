@@ -1,13 +1,14 @@
 """Case management client."""
 
 import logging
-import json
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from app.common.schemas import CaseRecord, Priority
 from app.common.utils import generate_id
-from app.common.config import get_config
+from app.common.config import Config, get_config
+from app.common.writer import BackgroundWriter, get_writer
 
 logger = logging.getLogger(__name__)
 
@@ -15,11 +16,34 @@ logger = logging.getLogger(__name__)
 class CaseClient:
     """Client for case creation and management."""
 
-    def __init__(self, config: Optional[object] = None):
-        """Initialize case client."""
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        writer: Optional[BackgroundWriter] = None,
+    ):
+        """
+        Initialize case client.
+        
+        Args:
+            config: Application configuration
+            writer: Background writer for case appends (default: shared
+                writer when config.async_writes is set, else write inline)
+        """
         self.config = config or get_config()
         self.artifacts_dir = self.config.setup_artifacts_dir()
+        if writer is None and self.config.async_writes:
+            writer = get_writer()
+        self.writer = writer
         self.cases_file = self.artifacts_dir / "cases.jsonl"
+        
+        # Append-only in-memory copy of cases_file; reads are served from here
+        self._cases: List[CaseRecord] = []
+        self._by_id: Dict[str, CaseRecord] = {}
+        self._loaded_size = 0
+        """Bytes of cases_file already loaded into the cache"""
+        self._lock = threading.Lock()
+        self._load_new_cases()
+        
         logger.info("Case client initialized in MOCK mode")
 
     def create_case(
@@ -52,9 +76,10 @@ class CaseClient:
         
         case_id = generate_id("CASE")
         
-        record = CaseRecord(
+        # Inputs come typed from internal callers; skip field validation
+        record = CaseRecord.model_construct(
             case_id=case_id,
-            priority=priority,
+            priority=Priority(priority),
             summary=summary,
             evidence_path=evidence_path,
             vehicle_make=vehicle_make,
@@ -68,49 +93,89 @@ class CaseClient:
         # Save to local file
         self._save_case(record)
         
-        logger.info(f"Case created: {case_id} (Priority: {priority})")
+        logger.info("Case created: %s (Priority: %s)", case_id, priority)
         return record
 
     def _save_case(self, case: CaseRecord) -> None:
-        """Save case record to file."""
+        """Append case record to file and add it to the cache."""
+        line = (case.model_dump_json() + "\n").encode()
+        
+        if self.writer is not None:
+            # Cached up front so reads see it before the write lands;
+            # skipped by _load_new_cases once written
+            with self._lock:
+                self._cache(case)
+            self.writer.submit(self.cases_file, line)
+            return
+        
         try:
-            with open(self.cases_file, "a") as f:
-                f.write(case.model_dump_json() + "\n")
-            logger.debug(f"Case saved to {self.cases_file}")
+            with self._lock:
+                with open(self.cases_file, "ab") as f:
+                    offset = f.tell()
+                    f.write(line)
+                    end = f.tell()
+                
+                # Only cache cases that actually reached the file
+                self._cache(case)
+                if offset == self._loaded_size:
+                    # Nothing appended by other writers in between
+                    self._loaded_size = end
+            logger.debug("Case saved to %s", self.cases_file)
         except Exception as e:
-            logger.error(f"Failed to save case: {str(e)}")
+            logger.error("Failed to save case: %s", e)
             raise
 
     def get_case(self, case_id: str) -> Optional[CaseRecord]:
         """Retrieve a case by ID."""
         try:
-            if not self.cases_file.exists():
-                return None
-            
-            with open(self.cases_file, "r") as f:
-                for line in f:
-                    case_data = json.loads(line)
-                    if case_data.get("case_id") == case_id:
-                        return CaseRecord(**case_data)
-            
-            return None
+            record = self._by_id.get(case_id)
+            if record is None:
+                # May have been written by another client since we loaded
+                self._sync()
+                record = self._by_id.get(case_id)
+            return record
         except Exception as e:
-            logger.error(f"Failed to retrieve case: {str(e)}")
+            logger.error("Failed to retrieve case: %s", e)
             return None
 
     def list_cases(self, limit: int = 100) -> list:
         """List recent cases."""
         try:
-            cases = []
+            self._sync()
+            return self._cases[-limit:] if limit > 0 else []
+        except Exception as e:
+            logger.error("Failed to list cases: %s", e)
+            return []
+
+    def _cache(self, case: CaseRecord) -> None:
+        """Add a case to the in-memory cache unless already present."""
+        if case.case_id not in self._by_id:
+            self._by_id[case.case_id] = case
+            self._cases.append(case)
+
+    def _sync(self) -> None:
+        """Drain pending writes and load cases appended by other clients."""
+        if self.writer is not None:
+            self.writer.flush()
+        self._load_new_cases()
+
+    def _load_new_cases(self) -> None:
+        """Load complete lines appended to cases_file since the last load."""
+        with self._lock:
             if not self.cases_file.exists():
-                return cases
+                return
+            if self.cases_file.stat().st_size <= self._loaded_size:
+                return
             
-            with open(self.cases_file, "r") as f:
+            with open(self.cases_file, "rb") as f:
+                f.seek(self._loaded_size)
                 for line in f:
-                    case_data = json.loads(line)
-                    cases.append(CaseRecord(**case_data))
-            
-            return cases[-limit:]
-        except Exception as e:
-            logger.error(f"Failed to list cases: {str(e)}")
-            return []
+                    if not line.endswith(b"\n"):
+                        # Write still in progress
+                        break
+                    self._loaded_size += len(line)
+                    try:
+                        self._cache(CaseRecord.model_validate_json(line))
+                    except ValueError as e:
+                        # Skip lines left by a crashed writer or an older schema
+                        logger.warning("Skipping unreadable case line in %s: %s", self.cases_file, e)
@@ -1,24 +1,73 @@
 """Evidence packet builder for case documentation."""
 
 import logging
-import json
-from datetime import datetime
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from app.common.schemas import EvidencePacket, VehiclePrediction, PlateResult, BOLOMatch
-from app.common.utils import generate_id
-from app.common.config import get_config
+from app.common.utils import dumps_json, generate_id, utc_now
+from app.common.config import Config, get_config
+from app.common.writer import BackgroundWriter, get_writer
 
 logger = logging.getLogger(__name__)
 
+# Shared GCS handles; storage.Client does auth discovery and HTTP session
+# setup, so build one per project and reuse it for every upload
+_gcs_clients: Dict[Optional[str], Any] = {}
+_gcs_buckets: Dict[Tuple[Optional[str], str], Any] = {}
+_gcs_lock = threading.Lock()
+
+
+def _get_gcs_bucket(project: Optional[str], bucket_name: str) -> Any:
+    """
+    Get a shared GCS bucket handle, creating the client on first use.
+    
+    Args:
+        project: GCP project for the storage client
+        bucket_name: Bucket to upload to
+        
+    Returns:
+        google.cloud.storage Bucket
+        
+    Raises:
+        ImportError: If google-cloud-storage is not installed
+    """
+    key = (project, bucket_name)
+    bucket = _gcs_buckets.get(key)
+    if bucket is None:
+        with _gcs_lock:
+            bucket = _gcs_buckets.get(key)
+            if bucket is None:
+                client = _gcs_clients.get(project)
+                if client is None:
+                    from google.cloud import storage
+                    
+                    client = _gcs_clients[project] = storage.Client(project=project)
+                bucket = _gcs_buckets[key] = client.bucket(bucket_name)
+    return bucket
+
 
 class EvidencePacketBuilder:
     """Builder for evidence packets."""
 
-    def __init__(self, config: Optional[object] = None):
-        """Initialize evidence builder."""
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        writer: Optional[BackgroundWriter] = None,
+    ):
+        """
+        Initialize evidence builder.
+        
+        Args:
+            config: Application configuration
+            writer: Background writer for local packets (default: shared
+                writer when config.async_writes is set, else write inline)
+        """
         self.config = config or get_config()
         self.artifacts_dir = self.config.setup_artifacts_dir()
+        if writer is None and self.config.async_writes:
+            writer = get_writer()
+        self.writer = writer
 
     def build(
         self,
@@ -45,7 +94,8 @@ class EvidencePacketBuilder:
         """
         
         packet_id = generate_id("EV")
-        timestamp = datetime.utcnow()
+        # One timestamp for the packet, its metadata and its filename
+        timestamp = utc_now()
         
         # Prepare packet data
         packet_data = {
@@ -54,22 +104,25 @@ class EvidencePacketBuilder:
             "image_uri": image_uri,
             "location": location,
             "notes": notes,
-            "vehicle_prediction": vehicle_prediction.model_dump(),
-            "plate_result": plate_result.model_dump() if plate_result else None,
-            "bolo_match": bolo_match.model_dump() if bolo_match else None,
+            "vehicle_prediction": vehicle_prediction.model_dump(mode="json"),
+            "plate_result": plate_result.model_dump(mode="json") if plate_result else None,
+            "bolo_match": bolo_match.model_dump(mode="json") if bolo_match else None,
         }
         
         # Save to file
-        evidence_path = self._save_evidence(packet_id, packet_data)
+        evidence_path = self._save_evidence(
+            packet_id, packet_data, timestamp.strftime("%Y%m%d_%H%M%S")
+        )
         
-        # Create packet object
-        packet = EvidencePacket(
+        # Create packet object; inputs are already-validated models
+        packet = EvidencePacket.model_construct(
             packet_id=packet_id,
             image_uri=image_uri,
             vehicle_prediction=vehicle_prediction,
             plate_result=plate_result,
             bolo_match=bolo_match,
             location=location,
+            timestamp=timestamp,
             notes=notes,
             evidence_path=evidence_path,
             metadata={
@@ -78,57 +131,60 @@ class EvidencePacketBuilder:
             },
         )
         
-        logger.info(f"Evidence packet created: {packet_id} -> {evidence_path}")
+        logger.info("Evidence packet created: %s -> %s", packet_id, evidence_path)
         return packet
 
-    def _save_evidence(self, packet_id: str, packet_data: dict) -> str:
-        """Save evidence packet to storage."""
+    def _save_evidence(self, packet_id: str, packet_data: dict, ts_str: str) -> str:
+        """Save evidence packet to storage; ts_str is the filename timestamp."""
         
         if self.config.use_gcs:
-            return self._save_to_gcs(packet_id, packet_data)
+            return self._save_to_gcs(packet_id, packet_data, ts_str)
         else:
-            return self._save_to_local(packet_id, packet_data)
+            return self._save_to_local(packet_id, packet_data, ts_str)
 
-    def _save_to_local(self, packet_id: str, packet_data: dict) -> str:
+    def _save_to_local(self, packet_id: str, packet_data: dict, ts_str: str) -> str:
         """Save evidence packet locally."""
-        filename = f"{packet_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+        filename = f"{packet_id}_{ts_str}.json"
         filepath = self.artifacts_dir / filename
         
         try:
-            with open(filepath, "w") as f:
-                json.dump(packet_data, f, indent=2, default=str)
-            logger.info(f"Evidence saved locally: {filepath}")
+            data = dumps_json(packet_data, indent=True)
+            if self.writer is not None:
+                self.writer.submit(filepath, data, append=False)
+                logger.info("Evidence queued for local save: %s", filepath)
+                return str(filepath)
+            
+            with open(filepath, "wb") as f:
+                f.write(data)
+            logger.info("Evidence saved locally: %s", filepath)
             return str(filepath)
         except Exception as e:
-            logger.error(f"Failed to save evidence locally: {str(e)}")
+            logger.error("Failed to save evidence locally: %s", e)
             raise
 
-    def _save_to_gcs(self, packet_id: str, packet_data: dict) -> str:
+    def _save_to_gcs(self, packet_id: str, packet_data: dict, ts_str: str) -> str:
         """Save evidence packet to GCS."""
         if not self.config.gcs_bucket:
             raise ValueError("GCS_BUCKET not configured")
         
         try:
-            from google.cloud import storage
-            
-            client = storage.Client(project=self.config.gcp_project)
-            bucket = client.bucket(self.config.gcs_bucket)
+            bucket = _get_gcs_bucket(self.config.gcp_project, self.config.gcs_bucket)
             
-            filename = f"evidence/{packet_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+            filename = f"evidence/{packet_id}_{ts_str}.json"
             blob = bucket.blob(filename)
             
             blob.upload_from_string(
-                json.dumps(packet_data, indent=2, default=str),
+                dumps_json(packet_data, indent=True),
                 content_type="application/json",
             )
             
             gcs_path = f"gs://{self.config.gcs_bucket}/{filename}"
-            logger.info(f"Evidence saved to GCS: {gcs_path}")
+            logger.info("Evidence saved to GCS: %s", gcs_path)
             return gcs_path
             
         except ImportError:
             logger.error("google-cloud-storage not installed")
             raise
         except Exception as e:
-            logger.error(f"Failed to save evidence to GCS: {str(e)}")
+            logger.error("Failed to save evidence to GCS: %s", e)
             raise
@@ -1,9 +1,15 @@
 """Vertex AI client for vehicle predictions."""
 
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
 from app.common.schemas import VehiclePrediction
-from app.common.utils import deterministic_hash, extract_image_uri_features
+from app.common.utils import (
+    deterministic_bits,
+    deterministic_hash,
+    extract_image_uri_features,
+    utc_now,
+)
 from app.common.config import get_config
 
 logger = logging.getLogger(__name__)
@@ -14,6 +20,57 @@ YEARS = ["2020-2021", "2021-2022", "2022-2023", "2023-2024"]
 COLORS = ["Black", "White", "Gray", "Silver", "Red", "Blue", "Green"]
 BODY_TYPES = ["sedan", "SUV", "truck", "coupe", "wagon"]
 
+# Mock attributes are indexed from 6-bit fields of one 32-bit URI hash,
+# scaled into range as (field * n) >> 6. MAKES and MODELS are index-aligned
+# pairs, so the model reuses the make index.
+_N_MAKES = len(MAKES)
+_N_YEARS = len(YEARS)
+_N_COLORS = len(COLORS)
+_N_BODY_TYPES = len(BODY_TYPES)
+
+
+@lru_cache(maxsize=256)
+def _mock_prediction(image_uri: str) -> VehiclePrediction:
+    """Deterministic mock prediction for a URI, memoized; callers get copies."""
+    features = extract_image_uri_features(image_uri)
+    h = deterministic_bits(image_uri)
+    
+    # Use hash bit fields to select model characteristics deterministically
+    make_idx = ((h & 0x3F) * _N_MAKES) >> 6
+    year_idx = (((h >> 6) & 0x3F) * _N_YEARS) >> 6
+    color_idx = (((h >> 12) & 0x3F) * _N_COLORS) >> 6
+    body_idx = (((h >> 18) & 0x3F) * _N_BODY_TYPES) >> 6
+    
+    # Confidence - lower if night/blur/low_res
+    base_confidence = deterministic_hash(image_uri + "_confidence")
+    if features["is_night"] or features["is_blur"]:
+        base_confidence *= 0.7
+    if features["is_low_res"]:
+        base_confidence *= 0.85
+    
+    image_condition = "clear"
+    if features["is_night"]:
+        image_condition = "night"
+    elif features["is_blur"]:
+        image_condition = "blur"
+    elif features["is_rain"]:
+        image_condition = "rain"
+    
+    return VehiclePrediction(
+        image_uri=image_uri,
+        make=MAKES[make_idx],
+        model=MODELS[make_idx],
+        year_range=YEARS[year_idx],
+        color=COLORS[color_idx],
+        body_type=BODY_TYPES[body_idx],
+        confidence=min(base_confidence, 1.0),
+        image_condition=image_condition,
+        metadata={
+            "model_version": "gemma-3n-v1.0",
+            "prediction_type": "mock",
+        },
+    )
+
 
 class VertexAIClient:
     """Client for Vertex AI endpoint calls."""
@@ -57,6 +114,21 @@ class VertexAIClient:
         else:
             return self._predict_mock(image_uri)
 
+    def predict_vehicle_batch(self, image_uris: List[str]) -> List[VehiclePrediction]:
+        """
+        Predict vehicles for several images in a single request.
+        
+        Args:
+            image_uris: Paths or URLs to images
+            
+        Returns:
+            VehiclePrediction for each image, in input order
+        """
+        if self.use_vertex:
+            return self._predict_real_batch(image_uris)
+        else:
+            return [self._predict_mock(uri) for uri in image_uris]
+
     def _predict_real(self, image_uri: str) -> VehiclePrediction:
         """Real Vertex AI prediction."""
         if not self.endpoint_id:
@@ -68,57 +140,52 @@ class VertexAIClient:
             # response = endpoint.predict(instances=[{"image_uri": image_uri}])
             # prediction = response.predictions[0]
             
-            logger.info(f"Calling Vertex AI endpoint {self.endpoint_id} for {image_uri}")
+            logger.info("Calling Vertex AI endpoint %s for %s", self.endpoint_id, image_uri)
             
             # Fallback to mock if real call would fail
             logger.warning("Real Vertex AI call not fully implemented, using mock")
             return self._predict_mock(image_uri)
             
         except Exception as e:
-            logger.error(f"Vertex AI prediction failed: {str(e)}")
+            logger.error("Vertex AI prediction failed: %s", e)
+            raise
+
+    def _predict_real_batch(self, image_uris: List[str]) -> List[VehiclePrediction]:
+        """Real Vertex AI multi-instance prediction."""
+        if not self.endpoint_id:
+            raise ValueError("VERTEX_ENDPOINT_ID not configured")
+        
+        try:
+            # This is pseudocode - actual implementation would use the SDK
+            # endpoint = self.aiplatform.Endpoint(self.endpoint_id)
+            # response = endpoint.predict(instances=[{"image_uri": uri} for uri in image_uris])
+            # predictions = response.predictions
+            
+            logger.info(
+                "Calling Vertex AI endpoint %s for %d images", self.endpoint_id, len(image_uris)
+            )
+            
+            # Fallback to mock if real call would fail
+            logger.warning("Real Vertex AI call not fully implemented, using mock")
+            return [self._predict_mock(uri) for uri in image_uris]
+            
+        except Exception as e:
+            logger.error("Vertex AI batch prediction failed: %s", e)
             raise
 
     def _predict_mock(self, image_uri: str) -> VehiclePrediction:
         """Deterministic mock prediction based on image URI hash."""
-        features = extract_image_uri_features(image_uri)
-        hash_val = features["hash_value"]
-        
-        # Use hash to select model characteristics deterministically
-        make_idx = int(hash_val * len(MAKES))
-        model_idx = int(hash_val * len(MODELS))
-        year_idx = int(hash_val * len(YEARS))
-        color_idx = int(hash_val * len(COLORS))
-        body_idx = int(hash_val * len(BODY_TYPES))
-        
-        # Confidence - lower if night/blur/low_res
-        base_confidence = deterministic_hash(image_uri + "_confidence")
-        if features["is_night"] or features["is_blur"]:
-            base_confidence *= 0.7
-        if features["is_low_res"]:
-            base_confidence *= 0.85
-        
-        image_condition = "clear"
-        if features["is_night"]:
-            image_condition = "night"
-        elif features["is_blur"]:
-            image_condition = "blur"
-        elif features["is_rain"]:
-            image_condition = "rain"
-        
-        prediction = VehiclePrediction(
-            image_uri=image_uri,
-            make=MAKES[make_idx % len(MAKES)],
-            model=MODELS[model_idx % len(MODELS)],
-            year_range=YEARS[year_idx % len(YEARS)],
-            color=COLORS[color_idx % len(COLORS)],
-            body_type=BODY_TYPES[body_idx % len(BODY_TYPES)],
-            confidence=min(base_confidence, 1.0),
-            image_condition=image_condition,
-            metadata={
-                "model_version": "gemma-3n-v1.0",
-                "prediction_type": "mock",
-            },
+        # Fresh timestamp and metadata so callers never share mutable state
+        cached = _mock_prediction(image_uri)
+        prediction = cached.model_copy(
+            update={"timestamp": utc_now(), "metadata": dict(cached.metadata)}
         )
         
-        logger.debug(f"Mock prediction for {image_uri}: {prediction.make} {prediction.model}")
+        logger.debug("Mock prediction for %s: %s %s", image_uri, prediction.make, prediction.model)
         return prediction
+
+
+@lru_cache(maxsize=1)
+def get_vertex_client() -> VertexAIClient:
+    """Get or create shared Vertex AI client for the global config."""
+    return VertexAIClient(get_config())
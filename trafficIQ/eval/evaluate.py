@@ -2,24 +2,141 @@
 
 import logging
 import json
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, fields
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import Callable, List, Dict, Any, Iterator, Optional, Set, Tuple
 
-from app.common.config import get_config
+import numpy as np
+
+from app.common.config import Config, get_config
+from app.common.schemas import VehiclePrediction
+from app.common.utils import loads_json, utc_now
 from app.tools.vertex_client import VertexAIClient
 from eval.metrics import Metrics, MetricsCalculator, ConfusionMatrix
 
 logger = logging.getLogger(__name__)
 
+# Markdown table row templates for the evaluation report
+_CLASS_ROW = "| {} | {:.4f} ({:.2f}%) |"
+_SAMPLE_ROW = "| {:20} | {:9} | {:14} | {:.2f} {} |"
+
+_get_sample_fields = itemgetter("image_uri", "true_make", "true_model", "true_year_range")
+
+
+def _sample_fields(sample: Dict[str, Any]) -> Tuple[Any, Any, Any, Any]:
+    """(image_uri, true_make, true_model, true_year_range) in one lookup, None if missing."""
+    try:
+        row: Tuple[Any, Any, Any, Any] = _get_sample_fields(sample)
+        return row
+    except KeyError:
+        return (
+            sample.get("image_uri", ""),
+            sample.get("true_make"),
+            sample.get("true_model"),
+            sample.get("true_year_range"),
+        )
+
+
+class _DaemonPool:
+    """
+    Runs fn over jobs on daemon worker threads, recording when each job starts.
+    
+    Unlike ThreadPoolExecutor, a hung call never blocks interpreter exit.
+    Futures cancelled before a worker picks them up are skipped.
+    """
+    
+    def __init__(self, fn: Callable[[Any], Any], jobs: List[Any], workers: int):
+        """
+        Queue every job and start the workers.
+        
+        Args:
+            fn: Blocking callable applied to each job
+            jobs: Inputs for fn
+            workers: Number of worker threads
+        """
+        self._fn = fn
+        self._work: "queue.SimpleQueue[Tuple[Future, Any]]" = queue.SimpleQueue()
+        self.futures: List[Future] = []
+        """One future per job, in input order"""
+        self.started: Dict[Future, float] = {}
+        """time.monotonic() at which a worker picked up each job"""
+        
+        for job in jobs:
+            future: Future = Future()
+            self._work.put((future, job))
+            self.futures.append(future)
+        for _ in range(workers):
+            self.add_worker()
+    
+    def add_worker(self) -> None:
+        """Start another worker, e.g. to replace one stuck on a hung call."""
+        threading.Thread(target=self._run, name="trafficiq-eval", daemon=True).start()
+    
+    def _run(self) -> None:
+        """Run queued jobs until none are left."""
+        while True:
+            try:
+                future, job = self._work.get_nowait()
+            except queue.Empty:
+                return
+            self.started[future] = time.monotonic()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._fn(job))
+            except Exception as e:
+                future.set_exception(e)
+
+
+
+@dataclass(eq=False)
+class Predictions:
+    """Evaluation results as parallel per-field arrays, one entry per sample."""
+    
+    image_uri: np.ndarray
+    true_make: np.ndarray
+    pred_make: np.ndarray
+    pred_confidence: np.ndarray
+    true_model: np.ndarray
+    pred_model: np.ndarray
+    true_year: np.ndarray
+    pred_year: np.ndarray
+    straggler: np.ndarray
+    """True where the prediction missed the eval SLA and holds a placeholder"""
+    
+    @classmethod
+    def allocate(cls, n: int) -> "Predictions":
+        """Allocate empty columns for n samples."""
+        columns = {f.name: np.empty(n, dtype=object) for f in fields(cls)}
+        columns["pred_confidence"] = np.empty(n, dtype=np.float64)
+        columns["straggler"] = np.zeros(n, dtype=np.bool_)
+        return cls(**columns)
+    
+    def __len__(self) -> int:
+        return len(self.image_uri)
+    
+    def rows(self, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield per-sample dicts lazily, for reporting."""
+        names = [f.name for f in fields(self)]
+        columns = [getattr(self, name)[:limit].tolist() for name in names]
+        for values in zip(*columns):
+            yield dict(zip(names, values))
+
 
 class Evaluator:
     """Main evaluation pipeline."""
     
-    def __init__(self, config: Optional[object] = None):
+    def __init__(self, config: Optional[Config] = None):
         """Initialize evaluator."""
         self.config = config or get_config()
         self.vertex_client = VertexAIClient(self.config)
+        self._prediction_cache: Dict[str, VehiclePrediction] = {}
         self.artifacts_dir = self.config.setup_artifacts_dir()
     
     def run_evaluation(
@@ -67,12 +184,11 @@ class Evaluator:
     
     def _load_dataset(self, dataset_path: str) -> List[Dict[str, Any]]:
         """Load evaluation dataset from JSONL."""
-        samples = []
+        samples: List[Dict[str, Any]] = []
         try:
-            with open(dataset_path, "r") as f:
-                for line in f:
-                    if line.strip():
-                        samples.append(json.loads(line))
+            # Parse raw bytes lines; no per-line str decode
+            with open(dataset_path, "rb") as f:
+                samples.extend(loads_json(line) for line in f if line.strip())
             logger.info(f"Loaded {len(samples)} samples from {dataset_path}")
         except FileNotFoundError:
             logger.error(f"Dataset file not found: {dataset_path}")
@@ -81,64 +197,175 @@ class Evaluator:
         
         return samples
     
-    def _run_predictions(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Run predictions on samples."""
-        predictions = []
+    def _run_predictions(self, samples: List[Dict[str, Any]]) -> Predictions:
+        """
+        Run predictions on samples concurrently, preserving sample order.
+        
+        Each distinct image URI is predicted once per evaluator; repeated
+        URIs, within or across runs, reuse the cached prediction. Batches
+        still running eval_sla_ms after a worker picked them up are abandoned
+        and their samples get straggler placeholders (not cached, so retried
+        next run). Calls run on daemon threads, so an abandoned hung call
+        does not hold up the run or interpreter exit.
+        """
+        sample_fields = [_sample_fields(sample) for sample in samples]
+        uris = [f[0] for f in sample_fields]
+        pending = [uri for uri in dict.fromkeys(uris) if uri not in self._prediction_cache]
+        errors: Dict[str, Exception] = {}
+        stragglers = set()
         
-        for i, sample in enumerate(samples):
+        if pending:
+            # One multi-instance request per chunk, chunks spread over the pool
+            size = max(1, self.config.eval_batch_size)
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            workers = max(1, min(self.config.eval_parallelism, len(chunks)))
+            
+            timeout = self.config.eval_sla_ms / 1000 if self.config.eval_sla_ms > 0 else None
+            
+            pool = _DaemonPool(self._predict_chunk, chunks, workers)
             try:
-                image_uri = sample.get("image_uri", "")
-                
-                # Get prediction
-                pred = self.vertex_client.predict_vehicle(image_uri)
-                
-                # Store prediction with true label
-                predictions.append({
-                    "image_uri": image_uri,
-                    "true_make": sample.get("true_make"),
-                    "pred_make": pred.make,
-                    "pred_confidence": pred.confidence,
-                    "true_model": sample.get("true_model"),
-                    "pred_model": pred.model,
-                    "true_year": sample.get("true_year_range"),
-                    "pred_year": pred.year_range,
-                })
-                
-                if (i + 1) % 5 == 0:
-                    logger.debug(f"Processed {i + 1}/{len(samples)} samples")
+                abandoned = self._await_chunks(pool, timeout)
+            finally:
+                # Skip chunks still queued if awaiting was interrupted
+                for future in pool.futures:
+                    future.cancel()
             
-            except Exception as e:
-                logger.error(f"Prediction failed for {sample.get('image_uri')}: {str(e)}")
+            for chunk, future in zip(chunks, pool.futures):
+                if future in abandoned:
+                    stragglers.update(chunk)
+                    logger.warning(
+                        f"Batch of {len(chunk)} exceeded {self.config.eval_sla_ms:.0f}ms SLA"
+                    )
+                    continue
+                try:
+                    results = future.result()
+                except Exception as e:
+                    errors.update(dict.fromkeys(chunk, e))
+                    continue
+                for uri, result in zip(chunk, results):
+                    if isinstance(result, Exception):
+                        errors[uri] = result
+                    else:
+                        self._prediction_cache[uri] = result
+            
+            logger.debug(f"Processed {len(pending) - len(stragglers)}/{len(pending)} unique images")
+        
+        completed = []
+        for row in sample_fields:
+            image_uri = row[0]
+            if image_uri in errors:
+                logger.error(f"Prediction failed for {image_uri}: {str(errors[image_uri])}")
                 continue
+            completed.append(row)
         
-        logger.info(f"Predictions complete: {len(predictions)}/{len(samples)} successful")
+        # Fill each column by index, pairing predictions with true labels
+        predictions = Predictions.allocate(len(completed))
+        for i, (image_uri, true_make, true_model, true_year) in enumerate(completed):
+            predictions.image_uri[i] = image_uri
+            predictions.true_make[i] = true_make
+            predictions.true_model[i] = true_model
+            predictions.true_year[i] = true_year
+            
+            if image_uri in stragglers:
+                predictions.pred_confidence[i] = 0.0
+                predictions.straggler[i] = True
+                continue
+            
+            pred = self._prediction_cache[image_uri]
+            predictions.pred_make[i] = pred.make
+            predictions.pred_confidence[i] = pred.confidence
+            predictions.pred_model[i] = pred.model
+            predictions.pred_year[i] = pred.year_range
+        
+        answered = len(predictions) - int(predictions.straggler.sum())
+        logger.info(f"Predictions complete: {answered}/{len(samples)} successful")
         return predictions
     
+    @staticmethod
+    def _await_chunks(pool: _DaemonPool, timeout: Optional[float]) -> Set[Future]:
+        """
+        Wait for every chunk, abandoning any running longer than timeout.
+        
+        Each chunk's budget starts when a worker picks it up, so time spent
+        queued behind other chunks does not count against it. A worker stuck
+        on an abandoned call is replaced so queued chunks keep moving.
+        
+        Returns:
+            Futures abandoned as stragglers
+        """
+        waiting = set(pool.futures)
+        abandoned: Set[Future] = set()
+        if timeout is None:
+            wait(waiting)
+            return abandoned
+        
+        while waiting:
+            now = time.monotonic()
+            deadlines = [pool.started[f] + timeout for f in waiting if f in pool.started]
+            # Chunks not yet started get re-checked within one budget
+            next_deadline = min(deadlines, default=now + timeout)
+            _, waiting = wait(
+                waiting, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED
+            )
+            
+            now = time.monotonic()
+            for future in list(waiting):
+                started = pool.started.get(future)
+                if started is not None and now - started >= timeout and not future.done():
+                    waiting.discard(future)
+                    abandoned.add(future)
+                    pool.add_worker()
+        return abandoned
+    
+    def _predict_chunk(self, chunk: List[str]) -> List[Any]:
+        """
+        Predict a chunk in one batch call, retrying per image if the batch fails.
+        
+        Returns:
+            A VehiclePrediction or the raised exception for each URI, in order
+        """
+        try:
+            return self.vertex_client.predict_vehicle_batch(chunk)
+        except Exception as e:
+            logger.warning(f"Batch of {len(chunk)} failed ({str(e)}); retrying one at a time")
+        
+        # Only the images that fail on their own are dropped
+        results: List[Any] = []
+        for image_uri in chunk:
+            try:
+                results.append(self.vertex_client.predict_vehicle(image_uri))
+            except Exception as e:
+                results.append(e)
+        return results
+    
     def _calculate_metrics(
         self,
         samples: List[Dict[str, Any]],
-        predictions: List[Dict[str, Any]],
+        predictions: Predictions,
     ) -> Metrics:
-        """Calculate evaluation metrics."""
+        """Calculate evaluation metrics over answered (non-straggler) predictions."""
         if not predictions:
             return Metrics()
         
-        true_makes = [p["true_make"] for p in predictions]
-        pred_makes = [p["pred_make"] for p in predictions]
-        confidences = [p["pred_confidence"] for p in predictions]
+        answered = ~predictions.straggler
+        true_makes = predictions.true_make[answered]
+        pred_makes = predictions.pred_make[answered]
+        confidences = predictions.pred_confidence[answered]
         
         # Overall accuracy
         accuracy = MetricsCalculator.calculate_accuracy(true_makes, pred_makes)
         
-        # Per-class accuracy for makes
-        accuracy_by_class = MetricsCalculator.calculate_per_class_accuracy(
-            true_makes, pred_makes
-        )
+        # Per-class accuracy and macro scores for makes, from one full matrix
+        full_cm = MetricsCalculator.confusion_matrix_from_labels(true_makes, pred_makes)
+        accuracy_by_class = full_cm.per_class_accuracy()
+        precision, recall, f1 = full_cm.macro_scores()
         
         # Confusion matrix (top makes)
-        top_makes = sorted(set(true_makes), key=lambda x: true_makes.count(x), reverse=True)[:5]
-        filtered_true = [m for m in true_makes if m in top_makes]
-        filtered_pred = [p for t, p in zip(true_makes, pred_makes) if t in top_makes]
+        top_makes = [make for make, _ in Counter(true_makes).most_common(5)]
+        top_set = set(top_makes)
+        filtered = [(t, p) for t, p in zip(true_makes, pred_makes) if t in top_set]
+        filtered_true = [t for t, _ in filtered]
+        filtered_pred = [p for _, p in filtered]
         
         cm = MetricsCalculator.confusion_matrix_from_labels(
             filtered_true, filtered_pred, top_makes
@@ -149,6 +376,9 @@ class Evaluator:
         
         metrics = Metrics(
             accuracy=accuracy,
+            precision_macro=precision,
+            recall_macro=recall,
+            f1_macro=f1,
             accuracy_by_class=accuracy_by_class,
             ece_confidence=ece,
         )
@@ -159,20 +389,25 @@ class Evaluator:
     def _generate_report(
         self,
         samples: List[Dict[str, Any]],
-        predictions: List[Dict[str, Any]],
+        predictions: Predictions,
         metrics: Metrics,
     ) -> str:
         """Generate markdown evaluation report."""
+        now = utc_now()
         lines = []
         
         lines.append("# TrafficIQ Evaluation Report\n")
-        lines.append(f"Generated: {datetime.utcnow().isoformat()}\n")
+        lines.append(f"Generated: {now.isoformat()}\n")
         
         # Summary
         lines.append("## Summary\n")
         lines.append(f"- Dataset Size: {len(samples)} samples")
-        lines.append(f"- Successful Predictions: {len(predictions)}/{len(samples)}")
-        lines.append(f"- Evaluation Date: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        straggler_count = int(predictions.straggler.sum())
+        lines.append(
+            f"- Successful Predictions: {len(predictions) - straggler_count}/{len(samples)}"
+        )
+        lines.append(f"- Straggler Predictions: {straggler_count}")
+        lines.append(f"- Evaluation Date: {now.strftime('%Y-%m-%d %H:%M:%S')}\n")
         
         # Metrics
         lines.append("## Overall Metrics\n")
@@ -187,25 +422,30 @@ class Evaluator:
             lines.append("## Per-Class Accuracy (Vehicle Makes)\n")
             lines.append("| Make | Accuracy |")
             lines.append("|------|----------|")
-            for make, acc in sorted(metrics.accuracy_by_class.items(), key=lambda x: x[1], reverse=True):
-                lines.append(f"| {make} | {acc:.4f} ({acc*100:.2f}%) |")
-            lines.append()
+            by_accuracy = sorted(metrics.accuracy_by_class.items(), key=lambda x: x[1], reverse=True)
+            lines.append("\n".join(
+                _CLASS_ROW.format(make, acc, acc * 100) for make, acc in by_accuracy
+            ))
+            lines.append("")
         
         # Sample predictions
         lines.append("## Sample Predictions\n")
         lines.append("| Image | True Make | Predicted Make | Confidence |")
         lines.append("|-------|-----------|----------------|------------|")
         
-        for pred in predictions[:10]:  # Show first 10
-            true_make = pred["true_make"]
-            pred_make = pred["pred_make"]
-            conf = pred["pred_confidence"]
-            match = "✓" if true_make == pred_make else "✗"
-            lines.append(
-                f"| {pred['image_uri'][-20:]:20} | {true_make:9} | {pred_make:14} | "
-                f"{conf:.2f} {match} |"
+        sample_rows = [
+            (
+                pred["image_uri"][-20:],
+                pred["true_make"],
+                "(straggler)" if pred["straggler"] else pred["pred_make"],
+                pred["pred_confidence"],
+                "✓" if pred["true_make"] == pred["pred_make"] else "✗",
             )
-        lines.append()
+            for pred in predictions.rows(limit=10)  # Show first 10
+        ]
+        if sample_rows:
+            lines.append("\n".join(_SAMPLE_ROW.format(*row) for row in sample_rows))
+        lines.append("")
         
         # Notes
         lines.append("## Notes\n")
@@ -3,7 +3,16 @@
 import logging
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass, field
-import json
+
+import numpy as np
+
+try:
+    from sklearn import metrics as sk_metrics
+except ImportError:
+    sk_metrics = None
+
+from app.common.utils import dumps_json
+from eval.metrics_kernels import confusion_counts
 
 logger = logging.getLogger(__name__)
 
@@ -13,28 +22,65 @@ class ConfusionMatrix:
     """Confusion matrix for multi-class classification."""
     
     classes: List[str] = field(default_factory=list)
-    matrix: List[List[int]] = field(default_factory=list)
+    matrix: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=np.int64))
     
     def __init__(self, classes: Optional[List[str]] = None):
         """Initialize confusion matrix."""
         self.classes = classes or []
-        self.matrix = [[0 for _ in self.classes] for _ in self.classes] if self.classes else []
+        self.class_to_idx = {cls: i for i, cls in enumerate(self.classes)}
+        self.matrix = np.zeros((len(self.classes), len(self.classes)), dtype=np.int64)
     
     def increment(self, true_idx: int, pred_idx: int):
         """Increment matrix cell."""
         if 0 <= true_idx < len(self.classes) and 0 <= pred_idx < len(self.classes):
-            self.matrix[true_idx][pred_idx] += 1
+            self.matrix[true_idx, pred_idx] += 1
+    
+    def per_class_accuracy(self) -> Dict[str, float]:
+        """Diagonal over row totals for each class with at least one true sample."""
+        if self.matrix.size == 0:
+            return {}
+        
+        totals = self.matrix.sum(axis=1)
+        acc = np.diag(self.matrix) / np.maximum(totals, 1)
+        return {
+            cls: float(a)
+            for cls, a, total in zip(self.classes, acc, totals)
+            if total > 0
+        }
+    
+    def macro_scores(self) -> Tuple[float, float, float]:
+        """
+        Macro-averaged precision, recall and F1 over all classes.
+        
+        Classes with no predicted (or no true) samples score 0 for
+        precision (or recall), as does F1 when both are 0.
+        
+        Returns:
+            (precision_macro, recall_macro, f1_macro)
+        """
+        if self.matrix.size == 0:
+            return 0.0, 0.0, 0.0
+        
+        diag = np.diag(self.matrix).astype(np.float64)
+        col = self.matrix.sum(axis=0)
+        row = self.matrix.sum(axis=1)
+        
+        precision = np.divide(diag, col, out=np.zeros_like(diag), where=col > 0)
+        recall = np.divide(diag, row, out=np.zeros_like(diag), where=row > 0)
+        denom = precision + recall
+        f1 = np.divide(2 * precision * recall, denom, out=np.zeros_like(diag), where=denom > 0)
+        return float(precision.mean()), float(recall.mean()), float(f1.mean())
     
     def to_dict(self) -> dict:
         """Convert to dictionary."""
         return {
             "classes": self.classes,
-            "matrix": self.matrix,
+            "matrix": self.matrix.tolist(),
         }
     
     def to_string(self) -> str:
         """Format as readable string."""
-        if not self.matrix:
+        if self.matrix.size == 0:
             return "Empty confusion matrix"
         
         lines = []
@@ -52,7 +98,7 @@ class ConfusionMatrix:
         for i, true_cls in enumerate(self.classes):
             row = f"{true_cls:<12}"
             for j in range(len(self.classes)):
-                row += f" | {self.matrix[i][j]:<10}"
+                row += f" | {self.matrix[i, j]:<10}"
             lines.append(row)
         
         return "\n".join(lines)
@@ -80,6 +126,10 @@ class Metrics:
             "ece_confidence": self.ece_confidence,
         }
     
+    def to_json(self) -> str:
+        """Serialize to indented JSON, using orjson when installed."""
+        return dumps_json(self.to_dict(), indent=True).decode()
+    
     def to_string(self) -> str:
         """Format as readable string."""
         lines = []
@@ -102,14 +152,23 @@ class Metrics:
 class MetricsCalculator:
     """Calculate evaluation metrics."""
     
+    @staticmethod
+    def _correct_mask(true_labels: List[str], pred_labels: List[str]) -> np.ndarray:
+        """Elementwise label match as a boolean array."""
+        true = np.asarray(true_labels, dtype=object)
+        pred = np.asarray(pred_labels, dtype=object)
+        mask: np.ndarray = true == pred
+        return mask
+    
     @staticmethod
     def calculate_accuracy(true_labels: List[str], pred_labels: List[str]) -> float:
         """Calculate overall accuracy."""
-        if not true_labels:
+        if len(true_labels) == 0:
             return 0.0
         
-        correct = sum(1 for t, p in zip(true_labels, pred_labels) if t == p)
-        return correct / len(true_labels)
+        if sk_metrics is not None:
+            return float(sk_metrics.accuracy_score(true_labels, pred_labels))
+        return float(MetricsCalculator._correct_mask(true_labels, pred_labels).mean())
     
     @staticmethod
     def calculate_per_class_accuracy(
@@ -117,18 +176,11 @@ class MetricsCalculator:
         pred_labels: List[str],
     ) -> Dict[str, float]:
         """Calculate per-class accuracy."""
-        per_class = {}
-        unique_classes = set(true_labels)
-        
-        for cls in unique_classes:
-            class_indices = [i for i, t in enumerate(true_labels) if t == cls]
-            if class_indices:
-                correct = sum(
-                    1 for i in class_indices if true_labels[i] == pred_labels[i]
-                )
-                per_class[cls] = correct / len(class_indices)
+        if len(true_labels) == 0:
+            return {}
         
-        return per_class
+        cm = MetricsCalculator.confusion_matrix_from_labels(true_labels, pred_labels)
+        return cm.per_class_accuracy()
     
     @staticmethod
     def confusion_matrix_from_labels(
@@ -137,18 +189,33 @@ class MetricsCalculator:
         classes: Optional[List[str]] = None,
     ) -> ConfusionMatrix:
         """Create confusion matrix from labels."""
-        if classes is None:
+        derived = classes is None
+        if derived:
             classes = sorted(set(true_labels) | set(pred_labels))
         
         cm = ConfusionMatrix(classes)
-        class_to_idx = {cls: i for i, cls in enumerate(classes)}
+        if not classes:
+            return cm
         
-        for true_label, pred_label in zip(true_labels, pred_labels):
-            if true_label in class_to_idx and pred_label in class_to_idx:
-                true_idx = class_to_idx[true_label]
-                pred_idx = class_to_idx[pred_label]
-                cm.increment(true_idx, pred_idx)
+        if sk_metrics is not None and derived:
+            # Every label is a class, so sklearn's subset-label checks don't apply
+            cm.matrix = sk_metrics.confusion_matrix(
+                true_labels, pred_labels, labels=classes
+            ).astype(np.int64)
+            return cm
         
+        # Factorize once; pairs with a label outside classes are dropped
+        class_to_idx = cm.class_to_idx
+        n = min(len(true_labels), len(pred_labels))
+        true_codes = np.fromiter(
+            (class_to_idx.get(t, -1) for t in true_labels), dtype=np.int32, count=n
+        )
+        pred_codes = np.fromiter(
+            (class_to_idx.get(p, -1) for p in pred_labels), dtype=np.int32, count=n
+        )
+        valid = (true_codes >= 0) & (pred_codes >= 0)
+        
+        cm.matrix = confusion_counts(true_codes[valid], pred_codes[valid], len(classes))
         return cm
     
     @staticmethod
@@ -157,41 +224,45 @@ class MetricsCalculator:
         pred_labels: List[str],
         confidences: List[float],
         n_bins: int = 10,
+        quantized: bool = False,
     ) -> float:
         """
         Calculate Expected Calibration Error (ECE).
         
         Measures gap between predicted confidence and actual accuracy.
+        
+        Args:
+            true_labels: Ground-truth labels
+            pred_labels: Predicted labels
+            confidences: Prediction confidences in [0, 1]
+            n_bins: Number of equal-width confidence bins
+            quantized: Bin on confidences quantized to uint8 (1/256 steps) with a
+                shift instead of float comparisons; n_bins must be a power of two
+                up to 256. Bins are then left-closed, and out-of-range
+                confidences clamp into the end bins.
         """
-        if not true_labels or len(true_labels) != len(confidences):
+        if len(true_labels) == 0 or len(true_labels) != len(confidences):
             return 0.0
         
-        # Bin confidences
-        bin_boundaries = [i / n_bins for i in range(n_bins + 1)]
-        ece = 0.0
-        
-        for i in range(n_bins):
-            lower = bin_boundaries[i]
-            upper = bin_boundaries[i + 1]
-            
-            # Get samples in this bin
-            in_bin = [
-                j for j, conf in enumerate(confidences)
-                if lower < conf <= upper
-            ]
-            
-            if not in_bin:
-                continue
-            
-            # Calculate accuracy in bin
-            accuracy_in_bin = sum(
-                1 for j in in_bin if true_labels[j] == pred_labels[j]
-            ) / len(in_bin)
-            
-            # Calculate average confidence in bin
-            avg_conf = sum(confidences[j] for j in in_bin) / len(in_bin)
-            
-            # Accumulate ECE
-            ece += len(in_bin) / len(true_labels) * abs(avg_conf - accuracy_in_bin)
-        
-        return ece
+        conf = np.asarray(confidences, dtype=np.float64)
+        correct = MetricsCalculator._correct_mask(true_labels, pred_labels)
+        weights = conf - correct
+        
+        if quantized:
+            if not 1 <= n_bins <= 256 or n_bins & (n_bins - 1):
+                raise ValueError(f"Quantized ECE needs a power-of-two n_bins <= 256, got {n_bins}")
+            conf_q = np.clip(np.floor(conf * 256), 0, 255).astype(np.uint8)
+            bin_idx = conf_q >> (9 - n_bins.bit_length())
+        else:
+            # Bin i covers (i/n_bins, (i+1)/n_bins]; confidences outside (0, 1] are dropped
+            bin_boundaries = np.arange(n_bins + 1) / n_bins
+            bin_idx = np.searchsorted(bin_boundaries, conf, side="left") - 1
+            in_range = (bin_idx >= 0) & (bin_idx < n_bins)
+            bin_idx = bin_idx[in_range]
+            weights = weights[in_range]
+        
+        # n_bin / N * |avg conf - accuracy| == |sum(conf - correct)| / N per bin,
+        # so a single weighted bincount covers every bin
+        gaps = np.bincount(bin_idx, weights=weights, minlength=n_bins)
+        
+        return float(np.abs(gaps).sum() / len(true_labels))
@@ -0,0 +1,63 @@
+"""Compiled counting kernels for evaluation metrics."""
+
+import numpy as np
+
+try:
+    import numba
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    _NUMBA_AVAILABLE = False
+
+
+def _confusion_counts_numpy(
+    true_codes: np.ndarray,
+    pred_codes: np.ndarray,
+    n_classes: int,
+) -> np.ndarray:
+    """Count (true, pred) code pairs with a flat bincount."""
+    flat = true_codes.astype(np.int64) * n_classes + pred_codes
+    counts = np.bincount(flat, minlength=n_classes * n_classes)
+    return counts.reshape(n_classes, n_classes)
+
+
+if _NUMBA_AVAILABLE:
+
+    @numba.njit(cache=True)
+    def _confusion_counts_numba(true_codes, pred_codes, n_classes):
+        """Count (true, pred) code pairs in a compiled loop."""
+        out = np.zeros((n_classes, n_classes), dtype=np.int64)
+        for i in range(true_codes.shape[0]):
+            out[true_codes[i], pred_codes[i]] += 1
+        return out
+
+
+def confusion_counts(
+    true_codes: np.ndarray,
+    pred_codes: np.ndarray,
+    n_classes: int,
+) -> np.ndarray:
+    """
+    Build a confusion matrix from integer class codes.
+
+    Uses a Numba kernel when Numba is installed, else a numpy bincount.
+
+    Args:
+        true_codes: True class codes in [0, n_classes)
+        pred_codes: Predicted class codes, same length as true_codes
+        n_classes: Number of classes
+
+    Returns:
+        int64 array of shape (n_classes, n_classes), rows true and columns predicted
+    """
+    true_codes = np.ascontiguousarray(true_codes, dtype=np.int32)
+    pred_codes = np.ascontiguousarray(pred_codes, dtype=np.int32)
+    if true_codes.shape != pred_codes.shape:
+        raise ValueError(
+            f"Shape mismatch: true_codes {true_codes.shape} vs pred_codes {pred_codes.shape}"
+        )
+
+    if _NUMBA_AVAILABLE:
+        counts: np.ndarray = _confusion_counts_numba(true_codes, pred_codes, n_classes)
+        return counts
+    return _confusion_counts_numpy(true_codes, pred_codes, n_classes)
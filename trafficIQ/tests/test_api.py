@@ -9,15 +9,62 @@ from datetime import datetime
 import os
 os.environ["ENVIRONMENT"] = "test"
 os.environ["USE_VERTEX"] = "false"
+# Per-process artifacts dir so parallel (xdist) workers don't share case files
+os.environ["ARTIFACTS_PATH"] = tempfile.mkdtemp(prefix="trafficiq-api-")
 
 from app.api.main import app
 from app.common.config import Config
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Create FastAPI test client."""
-    return TestClient(app)
+    """Create one FastAPI test client, running app startup/shutdown once per session."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestLifespan:
+    """Tests for application startup/shutdown."""
+    
+    def test_lifespan_warms_agent(self):
+        """Test startup builds the shared agent and serves requests."""
+        from app.api.routes import get_agent
+        
+        with TestClient(app) as lifespan_client:
+            assert get_agent.cache_info().currsize == 1
+            response = lifespan_client.post(
+                "/agent/run",
+                json={"image_uri": "gs://bucket/test_image.jpg"},
+            )
+            assert response.status_code == 200
+    
+    @pytest.mark.parametrize("version,has_orjson,expected", [
+        # Native Pydantic serialization only applies to JSONResponse
+        ("0.143.0", True, "JSONResponse"),
+        ("0.130.0", True, "JSONResponse"),
+        ("0.129.2", True, "ORJSONResponse"),
+        ("0.129.2", False, "JSONResponse"),
+        ("unknown", True, "ORJSONResponse"),
+    ])
+    def test_default_response_class(self, monkeypatch, version, has_orjson, expected):
+        """Test the response class follows the FastAPI version and orjson availability."""
+        import sys
+        import fastapi
+        from app.api import main
+        
+        if has_orjson:
+            pytest.importorskip("orjson")
+        else:
+            monkeypatch.setitem(sys.modules, "orjson", None)
+        monkeypatch.setattr(fastapi, "__version__", version)
+        
+        assert main.default_response_class().__name__ == expected
+    
+    def test_cors_middleware_omitted_outside_development(self):
+        """Test no CORS middleware is installed when no origins are allowed."""
+        from fastapi.middleware.cors import CORSMiddleware
+        
+        assert not any(m.cls is CORSMiddleware for m in app.user_middleware)
 
 
 class TestHealthEndpoint:
@@ -114,6 +161,39 @@ class TestAnalyzeEndpoint:
         assert data1["make"] == data2["make"]
         assert data1["model"] == data2["model"]
         assert data1["confidence"] == data2["confidence"]
+    
+    def test_analyze_uses_vertex_batch_queue(self, client, monkeypatch):
+        """Test analyze goes through the agent's shared Vertex batch queue."""
+        from app.api.routes import get_agent
+        
+        queue = get_agent().vertex_queue
+        predict_batch = queue.process_fn
+        batches = []
+        
+        def recording_predict_batch(image_uris):
+            batches.append(list(image_uris))
+            return predict_batch(image_uris)
+        
+        monkeypatch.setattr(queue, "process_fn", recording_predict_batch)
+        response = client.post("/analyze", json={"image_uri": "gs://bucket/queued.jpg"})
+        
+        assert response.status_code == 200
+        assert batches == [["gs://bucket/queued.jpg"]]
+    
+    def test_analyze_without_queues_calls_client(self, client, monkeypatch):
+        """Test analyze falls back to a direct client call when no queue is attached."""
+        from app.api import routes
+        from app.agent.router import TrafficIQAgent
+        
+        agent = TrafficIQAgent(routes.config)
+        monkeypatch.setattr(routes, "get_agent", lambda: agent)
+        response = client.post("/analyze", json={"image_uri": "gs://bucket/direct.jpg"})
+        
+        assert agent.vertex_queue is None
+        assert response.status_code == 200
+        assert response.json()["make"] == agent.vertex_client.predict_vehicle(
+            "gs://bucket/direct.jpg"
+        ).make
 
 
 class TestAgentRunEndpoint:
@@ -185,6 +265,20 @@ class TestAgentRunEndpoint:
         for field in required_fields:
             assert field in data, f"Missing field: {field}"
     
+    def test_agent_run_response_round_trips(self, client):
+        """Test pre-encoded agent response is valid AgentResult JSON."""
+        from app.common.schemas import AgentResult
+        
+        response = client.post(
+            "/agent/run",
+            json={"image_uri": "gs://bucket/test_image.jpg"},
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        result = AgentResult.model_validate_json(response.content)
+        assert result.case_record is not None
+    
     def test_agent_run_creates_case(self, client):
         """Test agent run creates case record."""
         response = client.post(
@@ -244,6 +338,41 @@ class TestAgentRunEndpoint:
         assert data["location"] == "Test Location"
 
 
+class TestAgentRunBatchEndpoint:
+    """Tests for /agent/run_batch endpoint."""
+    
+    def test_agent_run_batch_success(self, client):
+        """Test batch run returns one result per item, in order."""
+        uris = [f"gs://bucket/batch_image_{i}.jpg" for i in range(5)]
+        
+        response = client.post(
+            "/agent/run_batch",
+            json={"items": [{"image_uri": uri, "location": "Highway"} for uri in uris]},
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["image_uri"] for item in data] == uris
+        assert all(item["location"] == "Highway" for item in data)
+        assert all(item["priority"] in ["P0", "P1", "P2"] for item in data)
+    
+    def test_agent_run_batch_matches_single_run(self, client):
+        """Test batched predictions match single-image runs."""
+        uri = "gs://bucket/batch_vs_single.jpg"
+        
+        single = client.post("/agent/run", json={"image_uri": uri}).json()
+        batch = client.post("/agent/run_batch", json={"items": [{"image_uri": uri}]}).json()
+        
+        assert batch[0]["vehicle_prediction"]["make"] == single["vehicle_prediction"]["make"]
+        assert batch[0]["priority"] == single["priority"]
+    
+    def test_agent_run_batch_empty(self, client):
+        """Test batch run rejects empty item list."""
+        response = client.post("/agent/run_batch", json={"items": []})
+        
+        assert response.status_code == 422
+
+
 class TestIntegration:
     """Integration tests."""
     
@@ -0,0 +1,310 @@
+"""Tests for evaluation metrics."""
+
+import numpy as np
+import pytest
+from app.common.config import Config
+from eval.evaluate import Evaluator, Predictions
+from eval.metrics import MetricsCalculator
+
+
+@pytest.fixture(scope="session")
+def eval_config(tmp_path_factory):
+    """Create evaluation config with temp artifacts, shared across the session."""
+    return Config(
+        use_vertex=False,
+        use_gcs=False,
+        artifacts_path=str(tmp_path_factory.mktemp("eval")),
+        eval_parallelism=4,
+        eval_batch_size=4,
+    )
+
+
+class TestMetricsCalculator:
+    """Tests for metrics calculation."""
+    
+    def test_accuracy_and_per_class_accuracy(self):
+        """Test overall and per-class accuracy from label lists."""
+        true = ["Honda", "Honda", "Toyota", "Ford"]
+        pred = ["Honda", "Toyota", "Toyota", "Honda"]
+        
+        assert MetricsCalculator.calculate_accuracy(true, pred) == 0.5
+        assert MetricsCalculator.calculate_per_class_accuracy(true, pred) == {
+            "Honda": 0.5,
+            "Toyota": 1.0,
+            "Ford": 0.0,
+        }
+        assert MetricsCalculator.calculate_accuracy([], []) == 0.0
+        assert MetricsCalculator.calculate_per_class_accuracy([], []) == {}
+    
+    def test_metrics_to_json_round_trips(self):
+        """Test metrics serialize to JSON matching to_dict."""
+        from app.common.utils import loads_json
+        from eval.metrics import Metrics
+        
+        metrics = Metrics(accuracy=0.5, f1_macro=0.25, accuracy_by_class={"Honda": 0.5})
+        
+        assert loads_json(metrics.to_json()) == metrics.to_dict()
+    
+    def test_ece_bins_are_right_closed(self):
+        """Test ECE bins confidences into (lower, upper] and skips out-of-range values."""
+        true = ["A", "A", "A", "A"]
+        pred = ["A", "B", "A", "A"]
+        
+        # 0.3 falls in (0.2, 0.3]: one right, one wrong at mean conf 0.25 -> gap 0.25
+        # 0.0 is outside every bin; 1.0 falls in (0.9, 1.0] with no gap
+        ece = MetricsCalculator.calculate_ece(true, pred, [0.3, 0.2 + 1e-9, 0.0, 1.0])
+        
+        assert ece == pytest.approx(2 / 4 * 0.25, abs=1e-6)
+        assert MetricsCalculator.calculate_ece(true, pred, [0.5]) == 0.0
+    
+    def test_confusion_matrix_drops_unknown_labels(self):
+        """Test confusion matrix counts only pairs within the given classes."""
+        true = ["Honda", "Honda", "Toyota", "Ford", "Toyota"]
+        pred = ["Honda", "Toyota", "Toyota", "Honda", "Nissan"]
+        
+        cm = MetricsCalculator.confusion_matrix_from_labels(true, pred, ["Honda", "Toyota"])
+        
+        assert cm.matrix.tolist() == [[1, 1], [0, 1]]
+        assert cm.to_dict()["matrix"] == [[1, 1], [0, 1]]
+        assert cm.per_class_accuracy() == {"Honda": 0.5, "Toyota": 1.0}
+    
+    def test_quantized_ece_matches_float_bins(self):
+        """Test uint8-quantized ECE agrees with float binning for in-range confidences."""
+        rng = np.random.default_rng(0)
+        conf = rng.uniform(0.01, 1.0, 1000)
+        conf = np.append(conf, 1.0)
+        true = ["A"] * len(conf)
+        pred = rng.choice(["A", "B"], len(conf)).tolist()
+        
+        exact = MetricsCalculator.calculate_ece(true, pred, conf, n_bins=16)
+        quantized = MetricsCalculator.calculate_ece(true, pred, conf, n_bins=16, quantized=True)
+        
+        assert quantized == pytest.approx(exact)
+        with pytest.raises(ValueError):
+            MetricsCalculator.calculate_ece(true, pred, conf, n_bins=10, quantized=True)
+    
+    def test_macro_scores_from_confusion_matrix(self):
+        """Test macro precision/recall/F1 average per-class scores, zero for empty classes."""
+        true = ["Honda", "Honda", "Toyota", "Ford"]
+        pred = ["Honda", "Toyota", "Toyota", "Honda"]
+        
+        cm = MetricsCalculator.confusion_matrix_from_labels(true, pred)
+        precision, recall, f1 = cm.macro_scores()
+        
+        # Per class (Ford, Honda, Toyota): P = 0, 1/2, 1/2; R = 0, 1/2, 1; F1 = 0, 1/2, 2/3
+        assert precision == pytest.approx(1 / 3)
+        assert recall == pytest.approx(1 / 2)
+        assert f1 == pytest.approx((1 / 2 + 2 / 3) / 3)
+    
+    def test_sklearn_path_matches_numpy_path(self, monkeypatch):
+        """Test the optional scikit-learn path agrees with the built-in one."""
+        pytest.importorskip("sklearn")
+        from eval import metrics
+        
+        true = ["Honda", "Honda", "Toyota", "Ford", "Toyota"]
+        pred = ["Honda", "Toyota", "Toyota", "Honda", "Nissan"]
+        sk_cm = MetricsCalculator.confusion_matrix_from_labels(true, pred)
+        sk_acc = MetricsCalculator.calculate_accuracy(true, pred)
+        
+        monkeypatch.setattr(metrics, "sk_metrics", None)
+        
+        assert sk_cm.matrix.tolist() == (
+            MetricsCalculator.confusion_matrix_from_labels(true, pred).matrix.tolist()
+        )
+        assert sk_acc == MetricsCalculator.calculate_accuracy(true, pred)
+    
+    def test_confusion_counts_numpy_matches_kernel(self, monkeypatch):
+        """Test the numpy fallback counts code pairs like the default path."""
+        from eval import metrics_kernels
+        
+        true = np.array([0, 1, 2, 2, 1, 0])
+        pred = np.array([0, 2, 2, 1, 1, 0])
+        expected = metrics_kernels.confusion_counts(true, pred, 3)
+        
+        monkeypatch.setattr(metrics_kernels, "_NUMBA_AVAILABLE", False)
+        counts = metrics_kernels.confusion_counts(true, pred, 3)
+        
+        assert counts.dtype == np.int64
+        assert counts.tolist() == expected.tolist() == [[2, 0, 0], [0, 1, 1], [0, 1, 1]]
+
+
+class TestEvaluator:
+    """Tests for the evaluation pipeline."""
+    
+    def test_predictions_keep_sample_order(self, eval_config, monkeypatch):
+        """Test batched predictions come back in sample order, dropping only failed images."""
+        evaluator = Evaluator(eval_config)
+        predict_batch = evaluator.vertex_client.predict_vehicle_batch
+        predict = evaluator.vertex_client.predict_vehicle
+        
+        def flaky_predict_batch(image_uris):
+            if any(uri.endswith("bad.jpg") for uri in image_uris):
+                raise RuntimeError("upstream error")
+            return predict_batch(image_uris)
+        
+        def flaky_predict(image_uri):
+            if image_uri.endswith("bad.jpg"):
+                raise RuntimeError("upstream error")
+            return predict(image_uri)
+        
+        monkeypatch.setattr(evaluator.vertex_client, "predict_vehicle_batch", flaky_predict_batch)
+        monkeypatch.setattr(evaluator.vertex_client, "predict_vehicle", flaky_predict)
+        uris = [f"gs://bucket/img_{i}.jpg" for i in range(20)]
+        samples = [{"image_uri": uri, "true_make": "Honda"} for uri in uris]
+        samples.insert(7, {"image_uri": "gs://bucket/bad.jpg", "true_make": "Honda"})
+        
+        predictions = evaluator._run_predictions(samples)
+        
+        # The failed batch is retried per image, so only bad.jpg is lost
+        assert list(predictions.image_uri) == uris
+        assert predictions.pred_make[5] == predict(uris[5]).make
+    
+    def test_repeated_uris_predicted_once(self, eval_config, monkeypatch):
+        """Test duplicate URIs share one prediction within and across runs."""
+        evaluator = Evaluator(eval_config)
+        predict_batch = evaluator.vertex_client.predict_vehicle_batch
+        batches = []
+        
+        def counting_predict_batch(image_uris):
+            batches.append(list(image_uris))
+            return predict_batch(image_uris)
+        
+        monkeypatch.setattr(evaluator.vertex_client, "predict_vehicle_batch", counting_predict_batch)
+        samples = [{"image_uri": f"gs://bucket/img_{i % 6}.jpg"} for i in range(18)]
+        
+        first = evaluator._run_predictions(samples)
+        second = evaluator._run_predictions(samples)
+        
+        assert [len(b) for b in batches] == [4, 2]
+        assert sorted(sum(batches, [])) == [f"gs://bucket/img_{i}.jpg" for i in range(6)]
+        assert len(first) == len(second) == 18
+        assert list(first.rows()) == list(second.rows())
+    
+    def test_slow_batches_become_stragglers(self, eval_config, monkeypatch):
+        """Test batches past the SLA get placeholders, excluded from metrics and cache."""
+        import threading
+        
+        eval_config = eval_config.model_copy(update={"eval_sla_ms": 50.0})
+        evaluator = Evaluator(eval_config)
+        predict_batch = evaluator.vertex_client.predict_vehicle_batch
+        release = threading.Event()
+        
+        def slow_predict_batch(image_uris):
+            if "gs://bucket/slow.jpg" in image_uris:
+                release.wait(5)
+            return predict_batch(image_uris)
+        
+        monkeypatch.setattr(evaluator.vertex_client, "predict_vehicle_batch", slow_predict_batch)
+        samples = [{"image_uri": f"gs://bucket/img_{i}.jpg", "true_make": "Honda"} for i in range(4)]
+        samples.append({"image_uri": "gs://bucket/slow.jpg", "true_make": "Honda"})
+        
+        try:
+            predictions = evaluator._run_predictions(samples)
+        finally:
+            release.set()
+        metrics = evaluator._calculate_metrics(samples, predictions)
+        report = evaluator._generate_report(samples, predictions, metrics)
+        
+        assert predictions.straggler.tolist() == [False] * 4 + [True]
+        assert predictions.pred_make[4] is None
+        assert "gs://bucket/slow.jpg" not in evaluator._prediction_cache
+        assert metrics.accuracy == np.mean(predictions.pred_make[:4] == "Honda")
+        assert "- Successful Predictions: 4/5" in report
+        assert "- Straggler Predictions: 1" in report
+        assert "(straggler)" in report
+    
+    def test_sla_is_per_chunk_on_daemon_threads(self, eval_config, monkeypatch):
+        """Test each chunk's SLA starts when it runs, and hung calls never block exit."""
+        import threading
+        import time
+        
+        eval_config = eval_config.model_copy(update={"eval_sla_ms": 200.0, "eval_parallelism": 1})
+        evaluator = Evaluator(eval_config)
+        predict_batch = evaluator.vertex_client.predict_vehicle_batch
+        release = threading.Event()
+        workers = []
+        
+        def paced_predict_batch(image_uris):
+            workers.append(threading.current_thread())
+            if "gs://bucket/img_0.jpg" in image_uris:
+                release.wait(5)
+            else:
+                time.sleep(0.05)
+            return predict_batch(image_uris)
+        
+        monkeypatch.setattr(evaluator.vertex_client, "predict_vehicle_batch", paced_predict_batch)
+        samples = [{"image_uri": f"gs://bucket/img_{i}.jpg"} for i in range(24)]
+        
+        start = time.perf_counter()
+        try:
+            predictions = evaluator._run_predictions(samples)
+        finally:
+            release.set()
+        
+        # One hung chunk, then five 50ms chunks queued behind it on one worker:
+        # well past 200ms in total, yet only the hung chunk is a straggler
+        assert time.perf_counter() - start < 2.0
+        assert predictions.straggler.tolist() == [True] * 4 + [False] * 20
+        assert all(worker.daemon for worker in workers)
+    
+    def test_sample_fields_tolerate_missing_keys(self, eval_config):
+        """Test complete and partial samples both fill the label columns."""
+        samples = [
+            {
+                "image_uri": "gs://bucket/full.jpg",
+                "true_make": "Honda",
+                "true_model": "Civic",
+                "true_year_range": "2020-2021",
+            },
+            {"image_uri": "gs://bucket/partial.jpg", "true_make": "Ford"},
+        ]
+        
+        predictions = Evaluator(eval_config)._run_predictions(samples)
+        
+        assert predictions.true_model.tolist() == ["Civic", None]
+        assert predictions.true_year.tolist() == ["2020-2021", None]
+    
+    def test_load_dataset_skips_blank_lines(self, eval_config, tmp_path):
+        """Test JSONL loading parses each non-blank line as one sample."""
+        dataset = tmp_path / "data.jsonl"
+        dataset.write_text(
+            '{"image_uri": "gs://a.jpg", "true_make": "Honda"}\n'
+            "\n"
+            '{"image_uri": "gs://b.jpg", "true_make": "Citroën"}\n'
+        )
+        
+        samples = Evaluator(eval_config)._load_dataset(str(dataset))
+        
+        assert [s["true_make"] for s in samples] == ["Honda", "Citroën"]
+        assert Evaluator(eval_config)._load_dataset(str(tmp_path / "missing.jsonl")) == []
+    
+    def test_metrics_from_prediction_columns(self, eval_config):
+        """Test metrics read the prediction columns and rows rebuild per-sample dicts."""
+        evaluator = Evaluator(eval_config)
+        samples = [{"image_uri": f"gs://bucket/img_{i}.jpg", "true_make": "Honda"} for i in range(6)]
+        
+        predictions = evaluator._run_predictions(samples)
+        metrics = evaluator._calculate_metrics(samples, predictions)
+        
+        assert isinstance(predictions, Predictions)
+        assert predictions.pred_confidence.dtype == np.float64
+        assert metrics.accuracy == np.mean(predictions.pred_make == "Honda")
+        rows = list(predictions.rows(limit=2))
+        assert [r["image_uri"] for r in rows] == ["gs://bucket/img_0.jpg", "gs://bucket/img_1.jpg"]
+        assert rows[0]["pred_confidence"] == predictions.pred_confidence[0]
+    
+    def test_run_evaluation_writes_report(self, eval_config, tmp_path):
+        """Test a full evaluation run writes the markdown report with both tables."""
+        dataset = tmp_path / "data.jsonl"
+        dataset.write_text("\n".join(
+            f'{{"image_uri": "gs://bucket/img_{i}.jpg", "true_make": "Honda"}}' for i in range(12)
+        ))
+        report_path = tmp_path / "report.md"
+        
+        metrics = Evaluator(eval_config).run_evaluation(str(dataset), str(report_path))
+        report = report_path.read_text()
+        
+        assert "| Honda | " in report
+        assert report.count("bucket/img_") == 10
+        assert f"- **Accuracy**: {metrics.accuracy:.4f}" in report
+        assert "+00:00" in report.splitlines()[2]
@@ -1,91 +1,151 @@
 """Tests for agent router."""
 
 import pytest
-import tempfile
+from datetime import datetime
 from app.common.config import Config
 from app.common.schemas import Priority
 from app.agent.policy import PolicyConfig
-from app.agent.router import TrafficIQAgent
+from app.agent.prompts import Prompts
+from app.agent.router import TrafficIQAgent, STEP_NAMES, step_names
 
 
-@pytest.fixture
-def test_config():
-    """Create test config with temp artifacts."""
-    tmpdir = tempfile.mkdtemp()
+@pytest.fixture(scope="session")
+def test_config(tmp_path_factory):
+    """Create test config with temp artifacts, shared across the session."""
     return Config(
         use_vertex=False,
         use_gcs=False,
-        artifacts_path=tmpdir,
+        artifacts_path=str(tmp_path_factory.mktemp("artifacts")),
     )
 
 
+@pytest.fixture(scope="module")
+def agent(test_config):
+    """Create one agent shared by tests that only run the pipeline."""
+    return TrafficIQAgent(test_config)
+
+
+@pytest.fixture(scope="module")
+def default_run(agent):
+    """Run the pipeline once on the default test image for read-only checks."""
+    return agent.run(image_uri="gs://bucket/test_image.jpg")
+
+
+@pytest.fixture(scope="session")
+def policy():
+    """Create one policy with default thresholds shared by policy tests."""
+    return PolicyConfig()
+
+
+@pytest.fixture(scope="session")
+def default_policy():
+    """Get the shared PolicyConfig.default() instance."""
+    return PolicyConfig.default()
+
+
 class TestPolicyConfig:
     """Tests for policy configuration."""
     
-    def test_ocr_fallback_triggered_low_confidence(self):
-        """Test OCR fallback triggered for low confidence."""
-        policy = PolicyConfig()
+    @pytest.mark.parametrize("confidence,condition,expected", [
+        # Confidence alone decides for clear images
+        (0.60, "clear", True),
+        (0.75, "clear", False),
+        (0.80, "clear", False),
+        # Good confidence but degraded image should trigger OCR
+        (0.80, "night", True),
+        (0.80, "blur", True),
+        # Condition matching is case-insensitive
+        (0.80, "Low_Res", True),
+        # 0.95 - 0.15 night penalty still clears 0.70
+        (0.95, "night", False),
+        # Penalties stack: 0.95 - 0.15 night - 0.20 blur falls below 0.70
+        (0.95, "night_blur", True),
+    ])
+    def test_ocr_fallback(self, policy, confidence, condition, expected):
+        """Test OCR fallback from confidence and quality-penalized score."""
+        assert policy.should_use_ocr_fallback(confidence, condition) is expected
+    
+    @pytest.mark.parametrize("bolo_match,confidence,expected", [
+        # BOLO match + high confidence = P0
+        (True, 0.75, "P0"),
+        (True, 0.95, "P0"),
+        # BOLO match + medium confidence = P1
+        (True, 0.65, "P1"),
+        (True, 0.55, "P1"),
+        # No BOLO match = P2
+        (False, 0.95, "P2"),
+        # BOLO match but very low confidence = P2
+        (True, 0.40, "P2"),
+    ])
+    def test_priority_assignment(self, policy, bolo_match, confidence, expected):
+        """Test priority from BOLO match and confidence."""
+        assert policy.assign_priority(bolo_match=bolo_match, confidence=confidence) == expected
+    
+    def test_priority_assignment_boundaries(self):
+        """Test thresholds are inclusive and compared at full precision."""
+        policy = PolicyConfig(P1_MIN_CONFIDENCE=0.57)
         
-        # Low confidence should trigger OCR
-        assert policy.should_use_ocr_fallback(0.60, "clear") is True
+        assert policy.assign_priority(bolo_match=True, confidence=0.70) == "P0"
+        assert policy.assign_priority(bolo_match=True, confidence=0.6999) == "P1"
+        assert policy.assign_priority(bolo_match=True, confidence=0.57) == "P1"
+        assert policy.assign_priority(bolo_match=True, confidence=0.5699) == "P2"
         
-        # High confidence should skip OCR
-        assert policy.should_use_ocr_fallback(0.75, "clear") is False
+        fractional = PolicyConfig(P0_MIN_CONFIDENCE=0.705)
+        assert fractional.assign_priority(bolo_match=True, confidence=0.700) == "P1"
+        assert fractional.assign_priority_batch([True], [0.700])[0] == 1
     
-    def test_ocr_fallback_triggered_poor_image_quality(self):
-        """Test OCR fallback triggered for poor image quality."""
-        policy = PolicyConfig()
-        
-        # Good confidence but night image should trigger OCR
-        assert policy.should_use_ocr_fallback(0.80, "night") is True
+    def test_priority_batch_matches_single(self):
+        """Test batch priority codes agree with per-item assignment."""
+        from app.agent.policy_fast import PRIORITY_LABELS
         
-        # Good confidence but blur should trigger OCR
-        assert policy.should_use_ocr_fallback(0.80, "blur") is True
+        policy = PolicyConfig(P1_MIN_CONFIDENCE=0.57)
+        confidences = [i / 1000 for i in range(1001)]
+        bolo_matches = [i % 2 == 0 for i in range(1001)]
         
-        # Good confidence and clear should skip OCR
-        assert policy.should_use_ocr_fallback(0.80, "clear") is False
-    
-    def test_priority_assignment_p0(self):
-        """Test P0 priority assignment."""
-        policy = PolicyConfig()
+        codes = policy.assign_priority_batch(bolo_matches, confidences)
         
-        # BOLO match + high confidence = P0
-        assert policy.assign_priority(bolo_match=True, confidence=0.75) == "P0"
-        assert policy.assign_priority(bolo_match=True, confidence=0.95) == "P0"
+        assert [PRIORITY_LABELS[c] for c in codes] == [
+            policy.assign_priority(b, c) for b, c in zip(bolo_matches, confidences)
+        ]
     
-    def test_priority_assignment_p1(self):
-        """Test P1 priority assignment."""
-        policy = PolicyConfig()
-        
-        # BOLO match + medium confidence = P1
-        assert policy.assign_priority(bolo_match=True, confidence=0.65) == "P1"
-        assert policy.assign_priority(bolo_match=True, confidence=0.55) == "P1"
+    def test_priority_batch_rejects_mismatched_lengths(self, policy):
+        """Test batch assignment requires aligned inputs."""
+        with pytest.raises(ValueError):
+            policy.assign_priority_batch([True, False], [0.9])
     
-    def test_priority_assignment_p2(self):
-        """Test P2 priority assignment."""
-        policy = PolicyConfig()
-        
-        # No BOLO match = P2
-        assert policy.assign_priority(bolo_match=False, confidence=0.95) == "P2"
-        
-        # BOLO match but very low confidence = P2
-        assert policy.assign_priority(bolo_match=True, confidence=0.40) == "P2"
+    def test_default_config_created(self, default_policy):
+        """Test default configuration is created once and shared."""
+        assert default_policy.MIN_VEHICLE_CONFIDENCE_FOR_SKIP_OCR == 0.70
+        assert default_policy.MIN_PLATE_CONFIDENCE_FOR_BOLO == 0.60
+        assert PolicyConfig.default() is default_policy
+
+
+class TestPrompts:
+    """Tests for prompt templates."""
     
-    def test_default_config_created(self):
-        """Test default configuration is created."""
-        config = PolicyConfig.default()
-        
-        assert config.MIN_VEHICLE_CONFIDENCE_FOR_SKIP_OCR == 0.70
-        assert config.MIN_PLATE_CONFIDENCE_FOR_BOLO == 0.60
+    def test_prompts_match_format(self):
+        """Test pre-parsed prompts render like str.format."""
+        assert Prompts.get_analyze_prompt("gs://b/i.jpg", "Downtown") == (
+            Prompts.ANALYZE_INSTRUCTION.format(
+                image_uri="gs://b/i.jpg", location="Downtown", timestamp="Unknown"
+            )
+        )
+        assert Prompts.get_bolo_prompt("Honda", "Civic", "2020-2021") == (
+            Prompts.BOLO_INSTRUCTION.format(
+                make="Honda", model="Civic", year_range="2020-2021",
+                plate="Unknown", location="Unknown",
+            )
+        )
+        assert "Prediction Confidence: 0.75" in Prompts.get_priority_prompt(
+            True, 0.75, 0.5, "clear"
+        )
 
 
 class TestTrafficIQAgent:
     """Tests for main agent."""
     
-    def test_agent_initialization(self, test_config):
+    def test_agent_initialization(self, agent):
         """Test agent initializes successfully."""
-        agent = TrafficIQAgent(test_config)
-        
         assert agent.config is not None
         assert agent.policy is not None
         assert agent.vertex_client is not None
@@ -94,10 +154,8 @@ class TestTrafficIQAgent:
         assert agent.evidence_builder is not None
         assert agent.case_client is not None
     
-    def test_agent_run_complete(self, test_config):
+    def test_agent_run_complete(self, agent):
         """Test agent runs complete pipeline."""
-        agent = TrafficIQAgent(test_config)
-        
         result = agent.run(
             image_uri="gs://bucket/test_image.jpg",
             location="Downtown",
@@ -110,11 +168,8 @@ class TestTrafficIQAgent:
         assert result.processing_steps
         assert result.total_processing_time_ms > 0
     
-    def test_agent_run_with_timestamp(self, test_config):
+    def test_agent_run_with_timestamp(self, agent):
         """Test agent run with custom timestamp."""
-        from datetime import datetime
-        
-        agent = TrafficIQAgent(test_config)
         timestamp = datetime(2024, 1, 15, 14, 30, 0)
         
         result = agent.run(
@@ -126,10 +181,8 @@ class TestTrafficIQAgent:
         assert result is not None
         assert result.case_record is not None
     
-    def test_agent_ocr_fallback_path(self, test_config):
+    def test_agent_ocr_fallback_path(self, agent):
         """Test agent follows OCR fallback path for low confidence."""
-        agent = TrafficIQAgent(test_config)
-        
         # Use URI that triggers low confidence
         result = agent.run(
             image_uri="gs://bucket/low_confidence_image.jpg",
@@ -140,12 +193,9 @@ class TestTrafficIQAgent:
         if result.ocr_fallback_used:
             assert result.plate_result is not None
     
-    def test_agent_priority_assignment(self, test_config):
+    def test_agent_priority_assignment(self, default_run):
         """Test agent assigns priority correctly."""
-        agent = TrafficIQAgent(test_config)
-        
-        # Run with multiple URIs to test priority logic
-        result = agent.run(image_uri="gs://bucket/test_priority.jpg")
+        result = default_run
         
         # If BOLO match found, priority should be P0 or P1
         if result.bolo_match and result.bolo_match.is_match:
@@ -158,23 +208,44 @@ class TestTrafficIQAgent:
             # No BOLO match means P2
             assert result.priority == Priority.P2
     
-    def test_agent_case_creation(self, test_config):
-        """Test agent creates case record."""
-        agent = TrafficIQAgent(test_config)
+    def test_agent_priority_uses_policy(self, test_config):
+        """Test agent priority follows the configured policy thresholds."""
+        # Mock predicts a watchlisted Toyota at 0.88 confidence for this URI
+        image_uri = "gs://bucket/priority_8.jpg"
+        strict = PolicyConfig(P0_MIN_CONFIDENCE=1.0, P1_MIN_CONFIDENCE=1.0)
+        medium = PolicyConfig(P0_MIN_CONFIDENCE=1.0, P1_MIN_CONFIDENCE=0.0)
+        lax = PolicyConfig(P0_MIN_CONFIDENCE=0.0, P1_MIN_CONFIDENCE=0.0)
         
-        result = agent.run(image_uri="gs://bucket/test_image.jpg")
+        results = {
+            name: TrafficIQAgent(test_config, policy=policy).run(image_uri=image_uri)
+            for name, policy in [("strict", strict), ("medium", medium), ("lax", lax)]
+        }
+        
+        assert all(r.bolo_match.is_match for r in results.values())
+        assert results["strict"].priority == Priority.P2
+        assert results["medium"].priority == Priority.P1
+        assert results["lax"].priority == Priority.P0
+    
+    def test_agent_case_creation(self, default_run):
+        """Test agent creates case record."""
+        result = default_run
         
         assert result.case_record is not None
         assert result.case_record.case_id
         assert result.case_record.priority
         assert result.case_record.vehicle_make
         assert result.case_record.summary
+        
+        pred = result.vehicle_prediction
+        assert result.case_record.summary.startswith(
+            f"Vehicle ID: {pred.make} {pred.model} ({pred.year_range}) - "
+            f"{pred.color} {pred.body_type}. Confidence: {pred.confidence:.1%}. "
+        )
+        assert result.case_record.summary.endswith(f"Priority: {result.priority}.")
     
-    def test_agent_processing_steps_recorded(self, test_config):
+    def test_agent_processing_steps_recorded(self, default_run):
         """Test agent records all processing steps."""
-        agent = TrafficIQAgent(test_config)
-        
-        result = agent.run(image_uri="gs://bucket/test_image.jpg")
+        result = default_run
         
         expected_steps = [
             "vehicle_prediction_request",
@@ -183,3 +254,27 @@ class TestTrafficIQAgent:
         
         for step in expected_steps:
             assert step in result.processing_steps
+    
+    def test_agent_processing_steps_in_pipeline_order(self, default_run):
+        """Test recorded steps keep pipeline order and a single OCR branch."""
+        result = default_run
+        
+        assert result.processing_steps == sorted(
+            result.processing_steps, key=STEP_NAMES.index
+        )
+        ocr_branch = {"ocr_fallback_triggered", "ocr_skipped"}
+        assert len(ocr_branch & set(result.processing_steps)) == 1
+        assert result.processing_steps[-1] == "case_created"
+    
+    def test_step_names_from_mask(self):
+        """Test step mask expands to canonical names."""
+        assert step_names(0) == []
+        assert step_names((1 << 0) | (1 << 4)) == [STEP_NAMES[0], STEP_NAMES[4]]
+    
+    def test_agent_run_logs_formatted_messages(self, agent, caplog):
+        """Test lazy log arguments are rendered when INFO is enabled."""
+        with caplog.at_level("INFO", logger="app.agent.router"):
+            result = agent.run(image_uri="gs://bucket/test_image.jpg")
+        
+        assert f"Case created: {result.case_record.case_id}" in caplog.text
+        assert f"Priority assigned: {result.priority}" in caplog.text
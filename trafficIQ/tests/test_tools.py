@@ -1,6 +1,9 @@
 """Tests for tools layer."""
 
+import asyncio
 import pytest
+from datetime import datetime, timezone
+from app.common.batching import AsyncBatchQueue
 from app.common.config import Config
 from app.tools.vertex_client import VertexAIClient
 from app.tools.ocr_client import OCRClient
@@ -8,37 +11,73 @@ from app.tools.bolo_client import BOLOClient
 from app.tools.evidence import EvidencePacketBuilder
 from app.tools.case_client import CaseClient
 from app.common.schemas import Priority
+from app.common.writer import BackgroundWriter
+from app.common.utils import (
+    deterministic_hash,
+    extract_image_uri_features,
+    generate_id,
+    measure_time,
+    safe_json_serializable,
+)
 
 
-@pytest.fixture
-def mock_config():
-    """Create mock config for testing."""
+@pytest.fixture(scope="session")
+def mock_config(tmp_path_factory):
+    """Create mock config for testing, shared across the session."""
     return Config(
         use_vertex=False,
         use_gcs=False,
-        artifacts_path="./test_artifacts",
+        artifacts_path=str(tmp_path_factory.mktemp("tools")),
+        fast_test_mode=True,
     )
 
 
+@pytest.fixture(scope="session")
+def full_mock_config(mock_config):
+    """Mock config with fast test mode off, for tests of the mock logic itself."""
+    return mock_config.model_copy(update={"fast_test_mode": False})
+
+
+@pytest.fixture(scope="session")
+def bolo_client(full_mock_config):
+    """Create one BOLO client with the full mock watchlist logic."""
+    return BOLOClient(full_mock_config)
+
+
+@pytest.fixture(scope="module")
+def vertex(mock_config):
+    """Create one Vertex AI client shared by the module."""
+    return VertexAIClient(mock_config)
+
+
+@pytest.fixture(scope="module")
+def ocr(full_mock_config):
+    """Create one OCR client with the full mock plate logic."""
+    return OCRClient(full_mock_config)
+
+
+@pytest.fixture(scope="module")
+def case_client(mock_config):
+    """Create one case client shared by the module."""
+    return CaseClient(mock_config)
+
+
 class TestVertexClient:
     """Tests for Vertex AI client."""
     
-    def test_mock_prediction_deterministic(self, mock_config):
+    def test_mock_prediction_deterministic(self, vertex):
         """Test that mock predictions are deterministic."""
-        client = VertexAIClient(mock_config)
-        
         # Same URI should produce same prediction
-        pred1 = client.predict_vehicle("gs://bucket/image.jpg")
-        pred2 = client.predict_vehicle("gs://bucket/image.jpg")
+        pred1 = vertex.predict_vehicle("gs://bucket/image.jpg")
+        pred2 = vertex.predict_vehicle("gs://bucket/image.jpg")
         
         assert pred1.make == pred2.make
         assert pred1.model == pred2.model
         assert pred1.confidence == pred2.confidence
     
-    def test_mock_prediction_has_required_fields(self, mock_config):
+    def test_mock_prediction_has_required_fields(self, vertex):
         """Test that mock prediction has all required fields."""
-        client = VertexAIClient(mock_config)
-        pred = client.predict_vehicle("gs://bucket/image.jpg")
+        pred = vertex.predict_vehicle("gs://bucket/image.jpg")
         
         assert pred.image_uri
         assert pred.make
@@ -48,13 +87,40 @@ class TestVertexClient:
         assert pred.body_type
         assert 0.0 <= pred.confidence <= 1.0
         assert pred.image_condition
+        assert pred.timestamp.tzinfo is not None
     
-    def test_night_image_reduces_confidence(self, mock_config):
-        """Test that night images affect image condition."""
-        client = VertexAIClient(mock_config)
+    def test_mock_attributes_cover_all_values(self, vertex):
+        """Test hash bit fields reach every attribute and keep make/model paired."""
+        from app.tools.vertex_client import MAKES, MODELS, YEARS, COLORS, BODY_TYPES
         
-        clear_pred = client.predict_vehicle("gs://bucket/clear_test_image.jpg")
-        night_pred = client.predict_vehicle("gs://bucket/night_test_image.jpg")
+        preds = [vertex.predict_vehicle(f"gs://bucket/img_{i}.jpg") for i in range(500)]
+        
+        assert {p.make for p in preds} == set(MAKES)
+        assert {p.year_range for p in preds} == set(YEARS)
+        assert {p.color for p in preds} == set(COLORS)
+        assert {p.body_type for p in preds} == set(BODY_TYPES)
+        assert all(MODELS.index(p.model) == MAKES.index(p.make) for p in preds)
+    
+    def test_mock_prediction_memoized_as_fresh_copies(self, vertex):
+        """Test repeated URIs hit the memo but each caller gets its own copy."""
+        from app.tools.vertex_client import _mock_prediction
+        
+        uri = "gs://bucket/memo_test.jpg"
+        
+        first = vertex.predict_vehicle(uri)
+        hits = _mock_prediction.cache_info().hits
+        second = vertex.predict_vehicle(uri)
+        
+        assert _mock_prediction.cache_info().hits == hits + 1
+        assert second is not first
+        assert second.metadata is not first.metadata
+        assert second.timestamp >= first.timestamp
+        assert second.model_dump(exclude={"timestamp"}) == first.model_dump(exclude={"timestamp"})
+    
+    def test_night_image_reduces_confidence(self, vertex):
+        """Test that night images affect image condition."""
+        clear_pred = vertex.predict_vehicle("gs://bucket/clear_test_image.jpg")
+        night_pred = vertex.predict_vehicle("gs://bucket/night_test_image.jpg")
         
         # Both should have valid confidences
         assert 0.0 <= clear_pred.confidence <= 1.0
@@ -64,42 +130,86 @@ class TestVertexClient:
         assert night_pred.image_condition == "night"
         assert clear_pred.image_condition == "clear"
     
-    def test_blur_image_marked_correctly(self, mock_config):
+    def test_blur_image_marked_correctly(self, vertex):
         """Test that blur images are marked."""
-        client = VertexAIClient(mock_config)
-        pred = client.predict_vehicle("gs://bucket/blur_image.jpg")
+        pred = vertex.predict_vehicle("gs://bucket/blur_image.jpg")
         
         assert "blur" in pred.image_condition.lower()
+    
+    def test_batch_prediction_matches_single(self, vertex):
+        """Test that batch predictions match per-image predictions."""
+        uris = ["gs://bucket/a.jpg", "gs://bucket/night_b.jpg"]
+        
+        batch = vertex.predict_vehicle_batch(uris)
+        
+        assert [p.image_uri for p in batch] == uris
+        for uri, pred in zip(uris, batch):
+            assert pred.make == vertex.predict_vehicle(uri).make
 
 
 class TestOCRClient:
     """Tests for OCR client."""
     
-    def test_plate_extraction_deterministic(self):
+    def test_plate_extraction_deterministic(self, ocr):
         """Test that OCR extractions are deterministic."""
-        client = OCRClient()
-        
-        result1 = client.extract_plate("gs://bucket/plate_image.jpg")
-        result2 = client.extract_plate("gs://bucket/plate_image.jpg")
+        result1 = ocr.extract_plate("gs://bucket/plate_image.jpg")
+        result2 = ocr.extract_plate("gs://bucket/plate_image.jpg")
         
         assert result1.plate_number == result2.plate_number
         assert result1.confidence == result2.confidence
     
-    def test_plate_has_required_fields(self):
+    def test_plate_extraction_memoized_as_fresh_copies(self, ocr):
+        """Test repeated URIs reuse the memoized plate with a fresh timestamp."""
+        from app.tools.ocr_client import _mock_plate
+        
+        uri = "gs://bucket/plate_memo.jpg"
+        
+        first = ocr.extract_plate(uri)
+        hits = _mock_plate.cache_info().hits
+        second = ocr.extract_plate(uri)
+        
+        assert _mock_plate.cache_info().hits == hits + 1
+        assert second is not first
+        assert second.plate_number == first.plate_number
+        assert second.timestamp >= first.timestamp
+    
+    def test_plate_generation_leaves_global_random_state(self, ocr):
+        """Test plate generation does not reseed the global RNG."""
+        import random
+        
+        state = random.getstate()
+        ocr.extract_plate("gs://bucket/plate_image.jpg")
+        
+        assert random.getstate() == state
+    
+    def test_plate_pattern_placeholders_filled(self, ocr):
+        """Test every placeholder in a pattern is substituted."""
+        plates = [ocr._generate_plate("{upper}{num}{upper}", f"seed{i}") for i in range(20)]
+        
+        assert all("{" not in plate for plate in plates)
+        assert all(plate.isalnum() for plate in plates)
+    
+    def test_plate_has_required_fields(self, ocr):
         """Test that OCR result has required fields."""
-        client = OCRClient()
-        result = client.extract_plate("gs://bucket/image.jpg")
+        result = ocr.extract_plate("gs://bucket/image.jpg")
         
         assert result.plate_number
         assert 0.0 <= result.confidence <= 1.0
         assert result.image_uri
     
-    def test_night_image_reduces_plate_confidence(self):
-        """Test that night images reduce plate confidence."""
-        client = OCRClient()
+    def test_fast_test_mode_returns_fixed_plate(self, mock_config):
+        """Test fast test mode skips plate generation."""
+        client = OCRClient(mock_config)
+        result = client.extract_plate("gs://bucket/night_plate.jpg")
         
-        clear_result = client.extract_plate("gs://bucket/clear_plate.jpg")
-        night_result = client.extract_plate("gs://bucket/night_plate.jpg")
+        assert result.plate_number == "KLM4521"
+        assert result.confidence == 0.9
+        assert result.image_uri == "gs://bucket/night_plate.jpg"
+    
+    def test_night_image_reduces_plate_confidence(self, ocr):
+        """Test that night images reduce plate confidence."""
+        clear_result = ocr.extract_plate("gs://bucket/clear_plate.jpg")
+        night_result = ocr.extract_plate("gs://bucket/night_plate.jpg")
         
         assert night_result.confidence < clear_result.confidence
 
@@ -107,41 +217,58 @@ class TestOCRClient:
 class TestBOLOClient:
     """Tests for BOLO client."""
     
-    def test_honda_always_matches(self):
-        """Test that Honda make triggers BOLO match."""
-        client = BOLOClient()
-        result = client.lookup("Honda", "Civic", "2020-2021", "ABC1234")
-        
-        assert result.is_match is True
-        assert result.make == "Honda"
-    
-    def test_toyota_no_match(self):
-        """Test that Toyota typically doesn't match."""
-        client = BOLOClient()
-        result = client.lookup("Toyota", "Camry", "2020-2021", "ABC1234")
+    @pytest.mark.parametrize("make,model,yr,plate,loc,match", [
+        # Honda make is on the watchlist
+        ("Honda", "Civic", "2020-2021", "ABC1234", None, True),
+        # None means only the result structure is checked
+        ("Toyota", "Camry", "2020-2021", "ABC1234", None, None),
+        # Plate ending in 7 or make Honda should trigger
+        ("Honda", "Civic", "2020-2021", "ABC1237", None, True),
+        ("Ford", "F150", "2020-2021", "XYZ1234", "Downtown", None),
+    ])
+    def test_lookup(self, bolo_client, make, model, yr, plate, loc, match):
+        """Test lookups return valid results and match watched vehicles."""
+        result = bolo_client.lookup(make, model, yr, plate, loc)
         
-        # Without special plates, Toyota shouldn't match
-        # But let's verify the structure is correct
         assert isinstance(result.is_match, bool)
         assert result.reason
+        assert 0.0 <= result.match_confidence <= 1.0
+        if match is not None:
+            assert result.is_match is match
+            assert result.make == make
+    
+    def test_plate_match_reports_matched_pattern(self, bolo_client):
+        """Test plate matches name the ending or prefix that matched."""
+        ending = bolo_client.lookup("Ford", "F150", "2020-2021", "QRS1299")
+        prefix = bolo_client.lookup("Ford", "F150", "2020-2021", "XYZ1234")
+        
+        assert ending.reason == "Plate pattern match (99)"
+        assert prefix.reason == "Plate prefix match (XYZ)"
     
-    def test_plate_ending_7_matches(self):
-        """Test that plates ending in 7 trigger match."""
-        client = BOLOClient()
+    def test_fast_test_mode_returns_no_match(self, mock_config, bolo_client):
+        """Test fast test mode skips watchlist checks, consistent with the fixed plate."""
+        from app.tools.ocr_client import FAST_PLATE_NUMBER
+        
+        client = BOLOClient(mock_config)
         result = client.lookup("Honda", "Civic", "2020-2021", "ABC1237")
         
-        # Plate ending in 7 or make Honda should trigger
-        assert result.is_match is True
+        assert result.is_match is False
+        assert result.reason == "No match found"
+        assert bolo_client.lookup("Ford", "F150", "2020-2021", FAST_PLATE_NUMBER).is_match is False
     
-    def test_no_match_returns_valid_result(self):
-        """Test that no-match returns valid result."""
-        client = BOLOClient()
-        result = client.lookup("Ford", "F150", "2020-2021", "XYZ1234", "Downtown")
+    def test_generated_plate_matchers_agree_with_str_methods(self):
+        """Test unrolled matchers return the first pattern str methods would."""
+        from app.tools.bolo_client import _compile_plate_matcher
         
-        # Verify structure even if no match
-        assert isinstance(result.is_match, bool)
-        assert result.reason
-        assert 0.0 <= result.match_confidence <= 1.0
+        patterns = ("7", "99", "A99", "")
+        ending = _compile_plate_matcher("ending", patterns, suffix=True)
+        prefix = _compile_plate_matcher("prefix", ("AB", "ABC", "X"), suffix=False)
+        
+        for plate in ["", "7", "A99", "Z1299", "ABC", "XA", "QQQ"]:
+            assert ending(plate) == next((p for p in patterns if plate.endswith(p)), None)
+            assert prefix(plate) == next(
+                (p for p in ("AB", "ABC", "X") if plate.startswith(p)), None
+            )
 
 
 class TestEvidenceBuilder:
@@ -149,79 +276,421 @@ class TestEvidenceBuilder:
     
     def test_evidence_packet_created(self, mock_config):
         """Test that evidence packet is created successfully."""
-        import tempfile
         from app.common.schemas import VehiclePrediction
         
-        # Use temp directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config = Config(artifacts_path=tmpdir, use_gcs=False)
-            builder = EvidencePacketBuilder(config)
-            
-            pred = VehiclePrediction(
-                image_uri="test.jpg",
-                make="Honda",
-                model="Civic",
-                year_range="2020-2021",
-                color="black",
-                body_type="sedan",
-                confidence=0.95,
-            )
+        builder = EvidencePacketBuilder(mock_config)
+        
+        pred = VehiclePrediction(
+            image_uri="test.jpg",
+            make="Honda",
+            model="Civic",
+            year_range="2020-2021",
+            color="black",
+            body_type="sedan",
+            confidence=0.95,
+        )
+        
+        packet = builder.build(
+            image_uri="test.jpg",
+            vehicle_prediction=pred,
+        )
+        
+        assert packet.packet_id
+        assert packet.image_uri == "test.jpg"
+        assert packet.evidence_path
+    
+    def test_evidence_file_is_valid_json(self, tmp_path):
+        """Test the saved evidence file parses back to the packet data."""
+        import json
+        from app.common.schemas import VehiclePrediction
+        
+        builder = EvidencePacketBuilder(Config(artifacts_path=str(tmp_path), use_gcs=False))
+        pred = VehiclePrediction(
+            image_uri="test.jpg",
+            make="Honda",
+            model="Civic",
+            year_range="2020-2021",
+            color="black",
+            body_type="sedan",
+            confidence=0.95,
+        )
+        
+        packet = builder.build(image_uri="test.jpg", vehicle_prediction=pred)
+        
+        with open(packet.evidence_path) as f:
+            data = json.load(f)
+        assert data["packet_id"] == packet.packet_id
+        assert data["vehicle_prediction"]["make"] == "Honda"
+        assert data["timestamp"] == packet.metadata["saved_at"]
+        assert packet.timestamp.isoformat() == packet.metadata["saved_at"]
+        assert packet.timestamp.tzinfo is not None
+        assert packet.evidence_path.endswith(
+            f"{packet.packet_id}_{packet.timestamp.strftime('%Y%m%d_%H%M%S')}.json"
+        )
+
+
+class TestGCSBucketCache:
+    """Tests for shared GCS handles used by the evidence builder."""
+    
+    def test_gcs_client_built_once_per_project(self, monkeypatch):
+        """Test concurrent uploads share one client and bucket handle."""
+        import sys
+        import threading
+        import types
+        from app.tools import evidence
+        
+        created = []
+        
+        class FakeClient:
+            def __init__(self, project=None):
+                created.append(project)
             
-            packet = builder.build(
-                image_uri="test.jpg",
-                vehicle_prediction=pred,
+            def bucket(self, name):
+                return ("bucket", name)
+        
+        storage = types.SimpleNamespace(Client=FakeClient)
+        cloud = types.ModuleType("google.cloud")
+        cloud.storage = storage
+        google = types.ModuleType("google")
+        google.cloud = cloud
+        monkeypatch.setitem(sys.modules, "google", google)
+        monkeypatch.setitem(sys.modules, "google.cloud", cloud)
+        monkeypatch.setitem(sys.modules, "google.cloud.storage", storage)
+        monkeypatch.setattr(evidence, "_gcs_clients", {})
+        monkeypatch.setattr(evidence, "_gcs_buckets", {})
+        
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(evidence._get_gcs_bucket("proj", "bkt"))
             )
-            
-            assert packet.packet_id
-            assert packet.image_uri == "test.jpg"
-            assert packet.evidence_path
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert created == ["proj"]
+        assert results == [("bucket", "bkt")] * 8
 
 
 class TestCaseClient:
     """Tests for case client."""
     
-    def test_case_created_successfully(self, mock_config):
+    def test_case_created_successfully(self, case_client):
         """Test that case record is created."""
-        import tempfile
+        case = case_client.create_case(
+            summary="Test case",
+            priority=Priority.P0,
+            evidence_path="/path/to/evidence",
+            vehicle_make="Honda",
+            vehicle_model="Civic",
+            vehicle_year_range="2020-2021",
+        )
         
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config = Config(artifacts_path=tmpdir, use_gcs=False)
-            client = CaseClient(config)
-            
-            case = client.create_case(
-                summary="Test case",
-                priority=Priority.P0,
-                evidence_path="/path/to/evidence",
-                vehicle_make="Honda",
-                vehicle_model="Civic",
-                vehicle_year_range="2020-2021",
-            )
-            
-            assert case.case_id
-            assert case.priority == Priority.P0
-            assert case.status == "open"
+        assert case.case_id
+        assert case.priority == Priority.P0
+        assert case.status == "open"
     
-    def test_case_retrieved(self, mock_config):
+    def test_case_retrieved(self, case_client):
         """Test that created case can be retrieved."""
-        import tempfile
+        # Create case
+        created = case_client.create_case(
+            summary="Test case",
+            priority=Priority.P1,
+            evidence_path="/evidence",
+            vehicle_make="Toyota",
+            vehicle_model="Camry",
+            vehicle_year_range="2021-2022",
+        )
         
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config = Config(artifacts_path=tmpdir, use_gcs=False)
-            client = CaseClient(config)
-            
-            # Create case
-            created = client.create_case(
-                summary="Test case",
-                priority=Priority.P1,
-                evidence_path="/evidence",
-                vehicle_make="Toyota",
-                vehicle_model="Camry",
-                vehicle_year_range="2021-2022",
-            )
-            
-            # Retrieve case
-            retrieved = client.get_case(created.case_id)
-            
-            assert retrieved is not None
-            assert retrieved.case_id == created.case_id
-            assert retrieved.priority == Priority.P1
+        # Retrieve case
+        retrieved = case_client.get_case(created.case_id)
+        
+        assert retrieved is not None
+        assert retrieved.case_id == created.case_id
+        assert retrieved.priority == Priority.P1
+    
+    def test_cases_shared_across_clients(self, tmp_path):
+        """Test a client sees cases loaded at startup and written later by others."""
+        config = Config(artifacts_path=str(tmp_path), use_gcs=False)
+        writer = CaseClient(config)
+        first = writer.create_case(summary="First", priority=Priority.P2, evidence_path="/e1")
+        
+        reader = CaseClient(config)
+        second = writer.create_case(summary="Second", priority=Priority.P0, evidence_path="/e2")
+        
+        assert reader.get_case(first.case_id).summary == "First"
+        assert reader.get_case(second.case_id).summary == "Second"
+        assert reader.get_case("CASE-missing") is None
+        assert [c.case_id for c in reader.list_cases()] == [first.case_id, second.case_id]
+    
+    def test_cases_served_from_memory(self, tmp_path):
+        """Test reads of known cases don't go back to the file."""
+        client = CaseClient(Config(artifacts_path=str(tmp_path), use_gcs=False))
+        case = client.create_case(summary="Cached", priority=Priority.P1, evidence_path="/e")
+        
+        (tmp_path / "cases.jsonl").unlink()
+        
+        assert client.get_case(case.case_id) is case
+        assert client.list_cases() == [case]
+    
+    def test_failed_save_is_not_cached(self, tmp_path, monkeypatch):
+        """Test a case whose inline write fails is not served afterwards."""
+        client = CaseClient(Config(artifacts_path=str(tmp_path), use_gcs=False))
+        monkeypatch.setattr(client, "cases_file", tmp_path / "missing" / "cases.jsonl")
+        
+        with pytest.raises(OSError):
+            client.create_case(summary="Lost", priority=Priority.P2, evidence_path="/e")
+        
+        assert client.list_cases() == []
+    
+    def test_constructed_case_round_trips(self, tmp_path):
+        """Test unvalidated case records serialize and reload unchanged."""
+        client = CaseClient(Config(artifacts_path=str(tmp_path), use_gcs=False))
+        created = client.create_case(
+            summary="Round trip", priority="P1", evidence_path="/e", plate_number="ABC123"
+        )
+        
+        retrieved = client.get_case(created.case_id)
+        
+        assert created.priority is Priority.P1
+        assert created.created_at.tzinfo is not None
+        assert retrieved.model_dump() == created.model_dump()
+    
+    def test_list_cases_returns_most_recent(self, tmp_path):
+        """Test list_cases returns the last `limit` cases in write order."""
+        config = Config(artifacts_path=str(tmp_path), use_gcs=False)
+        client = CaseClient(config)
+        created = [
+            client.create_case(summary=f"Case {i}", priority=Priority.P2, evidence_path="/e")
+            for i in range(5)
+        ]
+        
+        listed = client.list_cases(limit=3)
+        
+        assert [c.case_id for c in listed] == [c.case_id for c in created[-3:]]
+    
+    def test_corrupt_case_line_skipped(self, tmp_path):
+        """Test an unreadable cases.jsonl line is skipped instead of breaking loads."""
+        config = Config(artifacts_path=str(tmp_path), use_gcs=False)
+        first = CaseClient(config).create_case(
+            summary="Before", priority=Priority.P1, evidence_path="/e"
+        )
+        with open(tmp_path / "cases.jsonl", "ab") as f:
+            f.write(b'{"case_id": "CASE-TRUNC", "prior\n')
+        
+        client = CaseClient(config)
+        last = client.create_case(summary="After", priority=Priority.P2, evidence_path="/e")
+        
+        assert [c.case_id for c in client.list_cases()] == [first.case_id, last.case_id]
+        assert [c.case_id for c in CaseClient(config).list_cases()] == [
+            first.case_id, last.case_id
+        ]
+
+
+class TestBackgroundWriter:
+    """Tests for background file writer."""
+    
+    def test_appends_in_order_after_flush(self, tmp_path):
+        """Test queued appends land in submission order once flushed."""
+        writer = BackgroundWriter()
+        target = tmp_path / "out.jsonl"
+        
+        for i in range(100):
+            writer.submit(target, f"{i}\n".encode())
+        writer.flush()
+        
+        assert target.read_text().splitlines() == [str(i) for i in range(100)]
+    
+    def test_replace_keeps_last_write(self, tmp_path):
+        """Test non-append writes replace the file contents."""
+        writer = BackgroundWriter()
+        target = tmp_path / "packet.json"
+        
+        writer.submit(target, b"old", append=False)
+        writer.submit(target, b"new", append=False)
+        writer.flush()
+        
+        assert target.read_bytes() == b"new"
+    
+    def test_bad_write_does_not_stall_flush(self, tmp_path):
+        """Test a failing write is logged and later writes still land."""
+        writer = BackgroundWriter()
+        path = tmp_path / "out.jsonl"
+        
+        writer.submit(path, "not bytes")
+        writer.flush()
+        writer.submit(path, b"ok\n")
+        writer.flush()
+        
+        assert path.read_bytes() == b"ok\n"
+    
+    def test_case_client_reads_queued_cases(self, tmp_path):
+        """Test cases written through the writer are readable immediately."""
+        config = Config(artifacts_path=str(tmp_path), use_gcs=False, async_writes=True)
+        client = CaseClient(config, writer=BackgroundWriter())
+        
+        created = [
+            client.create_case(summary=f"Case {i}", priority=Priority.P2, evidence_path="/e")
+            for i in range(3)
+        ]
+        
+        assert client.get_case(created[1].case_id).summary == "Case 1"
+        assert [c.case_id for c in client.list_cases()] == [c.case_id for c in created]
+
+
+class TestAsyncBatchQueue:
+    """Tests for async batch queue."""
+    
+    async def test_concurrent_requests_coalesced(self):
+        """Test that concurrent requests share upstream calls."""
+        calls = []
+        
+        def process(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+        
+        queue = AsyncBatchQueue(process, max_batch_size=4, max_wait_time=0.05)
+        results = await asyncio.gather(*(queue.add_request(i) for i in range(10)))
+        await queue.stop()
+        
+        assert results == [i * 2 for i in range(10)]
+        assert len(calls) == 3
+        assert all(len(batch) <= 4 for batch in calls)
+    
+    async def test_idle_queue_flushes_immediately(self):
+        """Test that a lone request is not held for the wait window."""
+        queue = AsyncBatchQueue(lambda items: items, max_batch_size=8, max_wait_time=1.0)
+        
+        result = await asyncio.wait_for(queue.add_request("x"), timeout=0.5)
+        await queue.stop()
+        
+        assert result == "x"
+        assert queue.waiting == 0
+    
+    async def test_batch_failure_propagates(self):
+        """Test that a failing batch raises in every waiting caller."""
+        def process(items):
+            raise RuntimeError("upstream down")
+        
+        queue = AsyncBatchQueue(process, max_batch_size=4, max_wait_time=0.01)
+        results = await asyncio.gather(
+            queue.add_request(1), queue.add_request(2), return_exceptions=True
+        )
+        await queue.stop()
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+    
+    async def test_bad_item_fails_only_its_caller(self):
+        """Test a failed batch is retried per item so good requests still succeed."""
+        calls = []
+        
+        def process(items):
+            calls.append(list(items))
+            if "bad" in items:
+                raise ValueError("bad input")
+            return [item.upper() for item in items]
+        
+        queue = AsyncBatchQueue(process, max_batch_size=4, max_wait_time=0.05)
+        results = await asyncio.gather(
+            *(queue.add_request(item) for item in ["a", "bad", "c"]),
+            return_exceptions=True,
+        )
+        await queue.stop()
+        
+        assert results[0] == "A" and results[2] == "C"
+        assert isinstance(results[1], ValueError)
+        assert calls[0] == ["a", "bad", "c"]
+        assert sorted(calls[1:]) == [["a"], ["bad"], ["c"]]
+
+
+class TestUtils:
+    """Tests for shared utilities."""
+    
+    def test_deterministic_hash_stable_and_in_range(self):
+        """Test hash is repeatable and maps into [0, 1)."""
+        values = [deterministic_hash(f"gs://bucket/img_{i}.jpg") for i in range(200)]
+        
+        assert values == [deterministic_hash(f"gs://bucket/img_{i}.jpg") for i in range(200)]
+        assert all(0.0 <= v < 1.0 for v in values)
+        assert len(set(values)) > 50
+    
+    def test_generate_id_format(self):
+        """Test IDs carry the prefix and 8 unique hex characters."""
+        ids = {generate_id("CASE") for _ in range(100)}
+        
+        assert len(ids) == 100
+        assert all(len(i) == len("CASE-") + 8 and i.startswith("CASE-") for i in ids)
+        assert all(int(i[5:], 16) >= 0 for i in ids)
+        assert len(generate_id()) == 8
+    
+    def test_measure_time_logs_only_when_info_enabled(self, caplog):
+        """Test timing is logged at INFO and skipped above it."""
+        @measure_time
+        def add(a, b):
+            return a + b
+        
+        with caplog.at_level("INFO", logger="app.common.utils"):
+            assert add(1, 2) == 3
+        assert "Function add took" in caplog.text
+        
+        caplog.clear()
+        with caplog.at_level("WARNING", logger="app.common.utils"):
+            assert add(2, 3) == 5
+        assert "Function add took" not in caplog.text
+    
+    def test_safe_json_serializable_dispatch(self):
+        """Test models, plain objects and other values are converted by type."""
+        from pathlib import PurePosixPath
+        from app.common.schemas import PlateResult
+        
+        class Point:
+            def __init__(self, x):
+                self.x = x
+        
+        plate = safe_json_serializable(
+            PlateResult(plate_number="ABC123", confidence=0.9, image_uri="test.jpg")
+        )
+        
+        assert plate["plate_number"] == "ABC123"
+        assert safe_json_serializable(Point(1)) == {"x": 1}
+        assert safe_json_serializable(Point(2)) == {"x": 2}
+        assert safe_json_serializable(PurePosixPath("/a/b")) == "/a/b"
+    
+    def test_image_uri_features_cached_read_only(self):
+        """Test cached URI features are shared and cannot be mutated."""
+        features = extract_image_uri_features("gs://bucket/night_car.jpg")
+        
+        assert features is extract_image_uri_features("gs://bucket/night_car.jpg")
+        assert features["is_night"] is True
+        with pytest.raises(TypeError):
+            features["is_night"] = False
+    
+    def test_image_uri_features_flags(self):
+        """Test each condition flag is detected case-insensitively."""
+        features = extract_image_uri_features("gs://bucket/NIGHT_rain_Low_Res.jpg")
+        
+        assert features["is_night"] is True
+        assert features["is_rain"] is True
+        assert features["is_low_res"] is True
+        assert features["is_blur"] is False
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_json_helpers_round_trip(self, monkeypatch, use_orjson):
+        """Test JSON helpers agree with and without orjson."""
+        from app.common import utils
+        
+        if not use_orjson:
+            monkeypatch.setattr(utils, "orjson", None)
+        elif utils.orjson is None:
+            pytest.skip("orjson not installed")
+        
+        payload = {"id": "EV-1", "score": 0.5, "tags": ["night"], "none": None}
+        
+        assert utils.loads_json(utils.dumps_json(payload)) == payload
+        assert utils.loads_json(utils.dumps_json(payload, indent=True)) == payload
+        assert isinstance(
+            utils.dumps_json({"at": datetime(2026, 1, 1, tzinfo=timezone.utc)}), bytes
+        )